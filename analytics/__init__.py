@@ -0,0 +1,3 @@
+from lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, ("crud", "endpoints", "schemas"))
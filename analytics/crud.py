@@ -0,0 +1,170 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import delete, desc, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+import models
+
+_orders = models.Order.__table__
+_items = models.OrderItem.__table__
+
+_day = func.date(_orders.c.created_at)
+_units = func.coalesce(func.sum(_items.c.quantity), 0)
+_revenue = func.coalesce(func.sum(_items.c.quantity * _items.c.price_at_order), 0)
+_order_count = {"orders": func.count(func.distinct(_orders.c.id))}
+_sold = _orders.join(_items, _items.c.order_id == _orders.c.id)
+
+# Строки витрин: (таблица, ключ группировки, источник, счётчик заказов).
+# Одна и та же выборка по заказам используется и для пошагового обновления
+# (заказ со знаком +1 или -1), и для полного пересчёта по истории. Категория
+# берётся из позиции заказа (на момент покупки), а не из текущего товара.
+# Дневная витрина считает заказы и без позиций: позиции удалённых товаров
+# вычитаются из выручки, но сам заказ остаётся
+_ROLLUPS = [
+    (
+        models.DailySales.__table__,
+        [_day],
+        _orders.outerjoin(_items, _items.c.order_id == _orders.c.id),
+        _order_count,
+    ),
+    (models.ProductSales.__table__, [_day, _items.c.product_id], _sold, {}),
+    (models.CategorySales.__table__, [_day, _items.c.category_id], _sold, {}),
+]
+
+
+def _rollup_select(keys, source, extra: dict, sign: int, where):
+    measures = {"units": _units, "revenue": _revenue, **extra}
+    return (
+        select(*keys, *(literal(sign) * value for value in measures.values()))
+        .select_from(source)
+        .where(where)
+        .group_by(*keys)
+    ), list(measures)
+
+
+def _apply(db: Session, where, sign: int, count_orders: bool = True):
+    for table, keys, source, extra in _ROLLUPS:
+        if not count_orders:
+            source, extra = _sold, {}
+        query, measures = _rollup_select(keys, source, extra, sign, where)
+        key_columns = [column.name for column in table.primary_key]
+        statement = insert(table).from_select(key_columns + measures, query)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={
+                    name: table.c[name] + statement.excluded[name] for name in measures
+                },
+            )
+        )
+
+
+def record_order(db: Session, order_id: int, sign: int = 1):
+    """Добавить заказ в витрины продаж (sign=-1 - вычесть, например при отмене).
+
+    Выполняется в транзакции вызывающего кода: витрины меняются вместе с
+    заказом. Заказ должен быть уже записан в базу (flush).
+    """
+    _apply(db, _orders.c.id == order_id, sign)
+
+
+def remove_products(db: Session, product_ids):
+    """Вычесть из витрин продажи товаров, которые сейчас будут удалены.
+
+    Позиции заказов удаляются вместе с товаром, поэтому их вклад вычитается
+    заранее - так витрины совпадают с пересчётом по оставшейся истории.
+    product_ids - список id или подзапрос.
+    """
+    _apply(
+        db,
+        _items.c.product_id.in_(product_ids)
+        & (_orders.c.status != models.OrderStatus.CANCELLED),
+        -1,
+        count_orders=False,
+    )
+
+
+def rebuild_sales(db) -> dict:
+    """Пересчитать витрины продаж по всем неотменённым заказам.
+
+    Принимает сессию или соединение; фиксация транзакции - на вызывающем.
+    """
+    counts = {}
+    for table, keys, source, extra in _ROLLUPS:
+        db.execute(delete(table))
+        query, measures = _rollup_select(
+            keys,
+            source,
+            extra,
+            1,
+            _orders.c.status != models.OrderStatus.CANCELLED,
+        )
+        key_columns = [column.name for column in table.primary_key]
+        counts[table.name] = db.execute(
+            insert(table).from_select(key_columns + measures, query)
+        ).rowcount
+    return counts
+
+
+def _in_range(query, day, date_from: Optional[date], date_to: Optional[date]):
+    if date_from:
+        query = query.where(day >= date_from)
+    if date_to:
+        query = query.where(day <= date_to)
+    return query
+
+
+def get_daily_revenue(
+    db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None
+) -> list[dict]:
+    sales = models.DailySales
+    query = select(sales.day, sales.orders, sales.units, sales.revenue).where(
+        sales.orders > 0
+    )
+    query = _in_range(query, sales.day, date_from, date_to).order_by(sales.day)
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+def get_product_sales(
+    db: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    order_by: str = "revenue",
+    limit: int = 20,
+) -> list[dict]:
+    sales = models.ProductSales
+    units = func.sum(sales.units).label("units")
+    revenue = func.sum(sales.revenue).label("revenue")
+    query = (
+        select(
+            sales.product_id, models.Product.name.label("product_name"), units, revenue
+        )
+        .join(models.Product, models.Product.id == sales.product_id)
+        .group_by(sales.product_id)
+        .having(units > 0)
+    )
+    query = _in_range(query, sales.day, date_from, date_to)
+    query = query.order_by(desc(order_by), sales.product_id).limit(limit)
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+def get_category_sales(
+    db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None
+) -> list[dict]:
+    sales = models.CategorySales
+    query = (
+        select(
+            sales.category_id,
+            models.Category.name.label("category_name"),
+            func.sum(sales.units).label("units"),
+            func.sum(sales.revenue).label("revenue"),
+        )
+        .join(models.Category, models.Category.id == sales.category_id)
+        .group_by(sales.category_id)
+        .having(func.sum(sales.units) > 0)
+    )
+    query = _in_range(query, sales.day, date_from, date_to)
+    query = query.order_by(desc("revenue"), sales.category_id)
+    return [dict(row) for row in db.execute(query).mappings()]
@@ -0,0 +1,67 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from database import get_read_db
+from security import check_manager_role
+from . import crud, schemas
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Аналитика"],
+    dependencies=[Depends(check_manager_role)],
+)
+
+
+def _date_range(
+    date_from: Optional[date] = Query(
+        None, description="Начало периода (включительно)"
+    ),
+    date_to: Optional[date] = Query(None, description="Конец периода (включительно)"),
+) -> tuple[Optional[date], Optional[date]]:
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="date_from cannot be later than date_to",
+        )
+    return date_from, date_to
+
+
+@router.get(
+    "/revenue",
+    response_model=List[schemas.DailyRevenue],
+    description="Выручка, число заказов и проданных единиц по дням",
+)
+def read_daily_revenue(
+    period: tuple = Depends(_date_range), db: Session = Depends(get_read_db)
+):
+    return crud.get_daily_revenue(db, *period)
+
+
+@router.get(
+    "/products",
+    response_model=List[schemas.ProductSales],
+    description="Самые продаваемые товары за период",
+)
+def read_product_sales(
+    period: tuple = Depends(_date_range),
+    order_by: schemas.SalesOrder = Query(
+        schemas.SalesOrder.REVENUE, description="Сортировка: по выручке или единицам"
+    ),
+    limit: int = Query(20, ge=1, le=500, description="Количество товаров"),
+    db: Session = Depends(get_read_db),
+):
+    return crud.get_product_sales(db, *period, order_by=order_by.value, limit=limit)
+
+
+@router.get(
+    "/categories",
+    response_model=List[schemas.CategorySales],
+    description="Выручка и проданные единицы по категориям за период",
+)
+def read_category_sales(
+    period: tuple = Depends(_date_range), db: Session = Depends(get_read_db)
+):
+    return crud.get_category_sales(db, *period)
@@ -0,0 +1,31 @@
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class SalesOrder(str, Enum):
+    REVENUE = "revenue"
+    UNITS = "units"
+
+
+class DailyRevenue(BaseModel):
+    day: date
+    orders: int
+    units: int
+    revenue: Decimal
+
+
+class ProductSales(BaseModel):
+    product_id: int
+    product_name: str
+    units: int
+    revenue: Decimal
+
+
+class CategorySales(BaseModel):
+    category_id: int
+    category_name: str
+    units: int
+    revenue: Decimal
@@ -1 +1,3 @@
-from .endpoints import *
+from lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, ("endpoints",))
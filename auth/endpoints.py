@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from database import get_db
-from security import verify_password, create_access_token
-from models import User
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from security import verify_password_async, create_access_token
+from user import crud as user_crud
 
 router = APIRouter(tags=["Auth"])
 
 
 @router.post("/login", description="Вход в систему для получения токена")
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await user_crud.get_user_by_email_async(db, form_data.username)
+    # Соединение не должно удерживаться, пока проверка пароля ждёт в очереди
+    await db.close()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -20,7 +23,7 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(form_data.password, user.hashed_password):
+    if not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+
+def use_temp_database() -> str:
+    """Направить приложение во временную базу и применить миграции.
+
+    Вызывается до импорта модулей приложения: они читают настройки
+    и обращаются к базе при импорте.
+    """
+    db_file = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False).name
+    os.environ["DB_NAME"] = db_file
+    for name in ("SECRET_KEY", "SALT"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("TOKEN_EXPIRE_MINUTES", "30")
+
+    import migrations
+    from database import engine
+
+    migrations.upgrade(engine)
+    return db_file
@@ -0,0 +1,143 @@
+"""Нагрузочный тест оформления заказов.
+
+Много потоков одновременно покупают товары с ограниченным остатком.
+В конце проверяется, что склад не ушёл в минус и продано ровно столько,
+сколько списано. Запуск: python -m benchmarks.checkout
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+from benchmarks import use_temp_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=2000, help="Попыток всего")
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=50, help="Остаток на товар")
+    parser.add_argument("--max-items", type=int, default=3, help="Позиций в корзине")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    db_file = use_temp_database()
+
+    from database import SessionLocal, engine
+    from sqlalchemy import func
+
+    import models
+    from order import crud as order_crud
+    from order import schemas as order_schemas
+
+    with SessionLocal() as db:
+        category = models.Category(name="Benchmark")
+        user = models.User(
+            username="benchmark",
+            email="benchmark@example.com",
+            hashed_password="-",
+            role=models.UserRole.BUYER,
+        )
+        db.add_all([category, user])
+        db.flush()
+        products = [
+            models.Product(
+                name=f"Product {i}",
+                price=100 + i,
+                stock=args.stock,
+                category_id=category.id,
+            )
+            for i in range(args.products)
+        ]
+        db.add_all(products)
+        db.commit()
+        product_ids = [product.id for product in products]
+        user_id = user.id
+
+    rng = random.Random(args.seed)
+    carts = [
+        order_schemas.OrderCreate(
+            items=[
+                order_schemas.OrderItemBase(
+                    product_id=rng.choice(product_ids), quantity=rng.randint(1, 3)
+                )
+                for _ in range(rng.randint(1, args.max_items))
+            ]
+        )
+        for _ in range(args.orders)
+    ]
+
+    lock = threading.Lock()
+    outcome = {"created": 0, "rejected": 0, "errors": 0}
+    queue = iter(carts)
+
+    def worker():
+        with SessionLocal() as db:
+            while True:
+                with lock:
+                    cart = next(queue, None)
+                if cart is None:
+                    return
+                try:
+                    order_crud.create_order(db, cart, user_id)
+                    result = "created"
+                except order_crud.InsufficientStockError:
+                    result = "rejected"
+                except Exception as e:
+                    db.rollback()
+                    print(f"Ошибка: {e}", file=sys.stderr)
+                    result = "errors"
+                with lock:
+                    outcome[result] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        stock = dict(db.query(models.Product.id, models.Product.stock).all())
+        sold = dict(
+            db.query(models.OrderItem.product_id, func.sum(models.OrderItem.quantity))
+            .group_by(models.OrderItem.product_id)
+            .all()
+        )
+    engine.dispose()
+    os.unlink(db_file)
+
+    negative = [pid for pid, left in stock.items() if left < 0]
+    mismatched = [
+        pid for pid, left in stock.items() if args.stock - left != sold.get(pid, 0)
+    ]
+    total_sold = sum(sold.values())
+
+    print(f"Потоков: {args.workers}, попыток: {args.orders}")
+    print(
+        f"Создано: {outcome['created']}, отклонено: {outcome['rejected']}, "
+        f"ошибок: {outcome['errors']}"
+    )
+    print(f"Продано единиц: {total_sold} из {args.stock * args.products}")
+    print(f"Время: {elapsed:.2f} с, заказов/с: {outcome['created'] / elapsed:.1f}")
+
+    if negative or mismatched or outcome["errors"]:
+        print(
+            f"ПЕРЕПРОДАЖА: отрицательный остаток {negative}, расхождение {mismatched}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    print("Перепродаж нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Сравнение сериализации списков: response_model FastAPI и JSONSerializer.
+
+Для страницы товаров, списка заказов и списка отзывов проверяется, что оба
+пути дают одинаковые байты, и измеряется время на один ответ.
+Запуск: python -m benchmarks.serialization
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import time
+from decimal import Decimal
+from typing import List
+
+from benchmarks import use_temp_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100, help="Строк в ответе")
+    parser.add_argument("--repeat", type=int, default=200, help="Повторов замера")
+    return parser.parse_args()
+
+
+def seed(db, rows: int):
+    import models
+
+    category = models.Category(name="Смартфоны")
+    user = models.User(
+        username="benchmark",
+        email="benchmark@example.com",
+        hashed_password="-",
+        role=models.UserRole.BUYER,
+    )
+    db.add_all([category, user])
+    db.flush()
+    now = datetime.datetime.now()
+    products = [
+        models.Product(
+            name=f"Смартфон {i}",
+            price=Decimal(f"{1000 + i}.99"),
+            category_id=category.id,
+            description=f"Описание товара номер {i}",
+            stock=i % 7,
+            rating_avg=(i % 5) + 1 / 3,
+            updated_at=now,
+        )
+        for i in range(rows)
+    ]
+    db.add_all(products)
+    db.flush()
+    db.add_all(
+        models.Order(
+            user_id=user.id,
+            status=models.OrderStatus.PENDING,
+            amount=product.price * 2,
+            item_count=1,
+            items=[
+                models.OrderItem(
+                    product_id=product.id,
+                    quantity=2,
+                    price_at_order=product.price,
+                    category_id=product.category_id,
+                )
+            ],
+        )
+        for product in products
+    )
+    db.add_all(
+        models.Review(
+            product_id=product.id,
+            user_id=user.id,
+            rating=4,
+            text="Хороший телефон, рекомендую",
+            status=models.ReviewStatus.APPROVED,
+        )
+        for product in products
+    )
+    db.commit()
+
+
+def measure(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+    db_file = use_temp_database()
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from sqlalchemy.orm import joinedload, selectinload
+
+    import models
+    from database import SessionLocal, engine
+    from order import crud as order_crud
+    from order import schemas as order_schemas
+    from product import crud as product_crud
+    from product import schemas as product_schemas
+    from review import crud as review_crud
+    from review import schemas as review_schemas
+    from serialization import JSONSerializer
+
+    with SessionLocal() as db:
+        seed(db, args.rows)
+
+    db = SessionLocal()
+    page = product_crud.get_products(db, limit=args.rows)
+    orders = (
+        db.query(models.Order)
+        .options(
+            joinedload(models.Order.user),
+            selectinload(models.Order.items).joinedload(models.OrderItem.product),
+        )
+        .all()
+    )
+    reviews = review_crud.get_reviews(db, limit=args.rows)
+
+    cases = [
+        ("ProductPage", product_schemas.ProductPage, page, lambda: page),
+        (
+            "List[Order]",
+            List[order_schemas.Order],
+            orders,
+            lambda: [order_crud.order_row(order) for order in orders],
+        ),
+        (
+            "List[Review]",
+            List[review_schemas.Review],
+            reviews,
+            lambda: [review_crud.review_row(review) for review in reviews],
+        ),
+    ]
+
+    loop = asyncio.new_event_loop()
+    failed = False
+    print(f"Строк в ответе: {args.rows}, повторов: {args.repeat}")
+    for name, annotation, content, shape in cases:
+        field = create_model_field("Response", annotation)
+        serializer = JSONSerializer(annotation)
+
+        def baseline():
+            data = loop.run_until_complete(
+                serialize_response(field=field, response_content=content)
+            )
+            return JSONResponse(data).body
+
+        def fast():
+            return serializer.dumps(shape())
+
+        same = baseline() == fast()
+        failed |= not same
+        before = measure(baseline, args.repeat)
+        after = measure(fast, args.repeat)
+        print(
+            f"{name:<13} response_model: {before:7.3f} мс  "
+            f"JSONSerializer: {after:7.3f} мс  "
+            f"ускорение: x{before / after:.1f}  "
+            f"байты совпадают: {'да' if same else 'НЕТ'}"
+        )
+
+    loop.close()
+    db.close()
+    engine.dispose()
+    os.unlink(db_file)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Сравнение профилей PRAGMA SQLite под смешанной нагрузкой.
+
+Для каждого профиля из database.SQLITE_PROFILES создаётся отдельная база:
+писатели выполняют короткие транзакции (изменение остатка товара, commit
+на каждую), читатели одновременно листают каталог. Печатаются commit/с,
+чтения/с, задержки чтения и число ошибок блокировки.
+Запуск: python -m benchmarks.sqlite_profiles
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks import use_temp_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", help="Профили (по умолчанию все)")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument(
+        "--commits", type=int, default=300, help="Транзакций на писателя"
+    )
+    return parser.parse_args()
+
+
+def run_profile(name: str, pragmas: dict, args) -> dict:
+    from sqlalchemy import create_engine, insert, update
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+
+    import migrations
+    import models
+    from database import apply_sqlite_pragmas
+    from product import crud as product_crud
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False).name
+    engine = create_engine(
+        f"sqlite:///{db_file}", connect_args={"check_same_thread": False}
+    )
+    apply_sqlite_pragmas(engine, pragmas)
+    migrations.upgrade(engine)
+
+    with Session(engine) as db:
+        category = models.Category(name="Смартфоны")
+        db.add(category)
+        db.flush()
+        db.execute(
+            insert(models.Product),
+            [
+                {
+                    "name": f"Смартфон {i}",
+                    "price": 1000 + i,
+                    "category_id": category.id,
+                    "description": f"Описание {i}",
+                    "stock": 100,
+                }
+                for i in range(args.products)
+            ],
+        )
+        db.commit()
+
+    product = models.Product.__table__
+    writing = threading.Event()
+    writing.set()
+    lock = threading.Lock()
+    stats = {"commits": 0, "reads": 0, "errors": 0, "latency": []}
+
+    def writer(seed: int):
+        rng = random.Random(seed)
+        with Session(engine) as db:
+            for _ in range(args.commits):
+                try:
+                    db.execute(
+                        update(product)
+                        .where(product.c.id == rng.randint(1, args.products))
+                        .values(stock=product.c.stock + 1)
+                    )
+                    db.commit()
+                    result = "commits"
+                except OperationalError:
+                    db.rollback()
+                    result = "errors"
+                with lock:
+                    stats[result] += 1
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        with Session(engine) as db:
+            while writing.is_set():
+                started = time.perf_counter()
+                try:
+                    product_crud.get_products(
+                        db, page=rng.randint(1, 50), limit=20, sort_by="price"
+                    )
+                    db.rollback()
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        stats["errors"] += 1
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    stats["reads"] += 1
+                    stats["latency"].append(elapsed)
+
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    readers = [
+        threading.Thread(target=reader, args=(100 + i,)) for i in range(args.readers)
+    ]
+    started = time.perf_counter()
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writing.clear()
+    for thread in readers:
+        thread.join()
+
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_file + suffix):
+            os.unlink(db_file + suffix)
+
+    latency = sorted(stats["latency"]) or [0.0]
+    return {
+        "commits": stats["commits"] / elapsed,
+        "reads": stats["reads"] / elapsed,
+        "p50": statistics.median(latency),
+        "p95": latency[max(int(len(latency) * 0.95) - 1, 0)],
+        "errors": stats["errors"],
+    }
+
+
+def main():
+    args = parse_args()
+    db_file = use_temp_database()
+
+    from database import SQLITE_PROFILES
+
+    profiles = args.profiles or list(SQLITE_PROFILES)
+    print(
+        f"Товаров: {args.products}, писателей: {args.writers} "
+        f"x {args.commits} транзакций, читателей: {args.readers}"
+    )
+    print(
+        f"{'профиль':<12}{'commit/с':>10}{'чтений/с':>10}"
+        f"{'p50, мс':>10}{'p95, мс':>10}{'ошибок':>8}"
+    )
+    for name in profiles:
+        result = run_profile(name, SQLITE_PROFILES[name], args)
+        print(
+            f"{name:<12}{result['commits']:>10.1f}{result['reads']:>10.1f}"
+            f"{result['p50']:>10.2f}{result['p95']:>10.2f}{result['errors']:>8}"
+        )
+    os.unlink(db_file)
+
+
+if __name__ == "__main__":
+    main()
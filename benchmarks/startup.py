@@ -0,0 +1,180 @@
+"""Профиль холодного старта приложения.
+
+Показывает время импорта модулей приложения (по данным -X importtime),
+время создания приложения, число подключений к базе во время импорта и
+задержку первого и повторного запроса к основным маршрутам.
+Запуск: python -m benchmarks.startup [--budget-ms 1500]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks import use_temp_database
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ROUTES = [
+    "/api/products/",
+    "/api/products/1",
+    "/api/categories/",
+    "/api/reviews/",
+    "/openapi.json",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        help="Допустимое время импорта main; при превышении код возврата 1",
+    )
+    parser.add_argument("--top", type=int, default=15, help="Строк в таблицах")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def _first_party() -> set[str]:
+    names = {path.stem for path in ROOT.glob("*.py")}
+    names.update(path.parent.name for path in ROOT.glob("*/__init__.py"))
+    return names
+
+
+def import_times() -> list[tuple[str, int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def child():
+    """Замеры внутри свежего процесса: импорт, запросы, подключения к базе."""
+    from sqlalchemy import event
+
+    import database
+
+    connects = []
+    for engine in (database.engine, database.async_engine.sync_engine):
+        event.listen(engine, "connect", lambda *args: connects.append(time.time()))
+
+    started = time.perf_counter()
+    import main
+
+    import_ms = (time.perf_counter() - started) * 1000
+    import_connects = len(connects)
+    openapi_deferred = main.app.openapi_schema is None
+
+    from fastapi.testclient import TestClient
+
+    requests = []
+    with TestClient(main.app) as client:
+        for route in ROUTES:
+            timings = []
+            for _ in range(2):
+                started = time.perf_counter()
+                response = client.get(route)
+                timings.append((time.perf_counter() - started) * 1000)
+            requests.append((route, response.status_code, *timings))
+
+    print(
+        json.dumps(
+            {
+                "import_ms": import_ms,
+                "import_connects": import_connects,
+                "openapi_deferred": openapi_deferred,
+                "requests": requests,
+            }
+        )
+    )
+
+
+def seed():
+    import models
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        category = models.Category(name="Смартфоны")
+        db.add(category)
+        db.flush()
+        db.add(
+            models.Product(
+                name="Смартфон",
+                price=1000,
+                category_id=category.id,
+                description="Описание",
+                stock=1,
+            )
+        )
+        db.commit()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        child()
+        return
+
+    db_file = use_temp_database()
+    seed()
+
+    rows = import_times()
+    first_party = _first_party()
+    total_us = next(c for name, _, c in rows if name == "main")
+    app_rows = [row for row in rows if row[0].split(".")[0] in first_party]
+    libraries = [row for row in rows if "." not in row[0] and row[0] not in first_party]
+
+    print(f"Импорт main: {total_us / 1000:.1f} мс (холодный процесс, -X importtime)")
+    print(f"\nМодули приложения (собственное время, мс / с зависимостями, мс):")
+    for name, self_us, cumulative_us in sorted(app_rows, key=lambda r: -r[1])[
+        : args.top
+    ]:
+        print(f"  {name:<32} {self_us / 1000:8.1f} {cumulative_us / 1000:10.1f}")
+    print(f"\nБиблиотеки (с зависимостями, мс):")
+    for name, _, cumulative_us in sorted(libraries, key=lambda r: -r[2])[: args.top]:
+        print(f"  {name:<32} {cumulative_us / 1000:10.1f}")
+
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    os.unlink(db_file)
+
+    print(f"\nИмпорт и создание приложения: {measured['import_ms']:.1f} мс")
+    print(f"Подключений к базе при импорте: {measured['import_connects']}")
+    print(
+        "Схема OpenAPI при старте: "
+        + ("не строится" if measured["openapi_deferred"] else "СТРОИТСЯ")
+    )
+    print("\nПервый / повторный запрос, мс:")
+    for route, status_code, first, second in measured["requests"]:
+        print(f"  {route:<24} {status_code}  {first:8.1f} {second:8.1f}")
+
+    failed = measured["import_connects"] or not measured["openapi_deferred"]
+    if args.budget_ms is not None and measured["import_ms"] > args.budget_ms:
+        print(f"\nБюджет старта превышен: {args.budget_ms:.0f} мс")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from .crud import *
-from .endpoints import *
-from .schemas import *
+from lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, ("crud", "endpoints", "schemas"))
@@ -1,12 +1,49 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from typing import Optional
 import models
 from . import schemas
+from product import crud as prod_crud
+from analytics import crud as analytics_crud
+import etag
 
 
 def get_category(db: Session, category_id: int):
     return db.query(models.Category).filter(models.Category.id == category_id).first()
 
 
+def get_category_detail(
+    db: Session,
+    category_id: int,
+    limit: int = 10,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "asc",
+    cursor: Optional[str] = None,
+) -> Optional[dict]:
+    db_category = get_category(db, category_id)
+    if db_category is None:
+        return None
+    product_count, in_stock_count = prod_crud.get_category_counts(db, category_id)
+    # Порядок ключей совпадает с порядком полей схемы CategoryWithProducts
+    return {
+        "name": db_category.name,
+        "id": db_category.id,
+        "created_at": db_category.created_at,
+        "updated_at": db_category.updated_at,
+        "product_count": product_count,
+        "in_stock_count": in_stock_count,
+        "products": prod_crud.get_category_products(
+            db,
+            category_id,
+            product_count,
+            limit=limit,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+        ),
+    }
+
+
 def get_categories(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Category).offset(skip).limit(limit).all()
 
@@ -14,6 +51,7 @@ def get_categories(db: Session, skip: int = 0, limit: int = 100):
 def create_category(db: Session, category: schemas.CategoryCreate):
     db_category = models.Category(**category.model_dump())
     db.add(db_category)
+    etag.bump_version(db, etag.CATEGORIES)
     db.commit()
     db.refresh(db_category)
     return db_category
@@ -29,7 +67,9 @@ def update_category(
         update_data = category_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_category, key, value)
+        etag.bump_version(db, etag.CATEGORIES)
         db.commit()
+        prod_crud.invalidate_product_counts()
         db.refresh(db_category)
     return db_category
 
@@ -39,6 +79,12 @@ def delete_category(db: Session, category_id: int):
         db.query(models.Category).filter(models.Category.id == category_id).first()
     )
     if db_category:
+        analytics_crud.remove_products(
+            db,
+            select(models.Product.id).where(models.Product.category_id == category_id),
+        )
         db.delete(db_category)
+        etag.bump_version(db, etag.CATEGORIES, etag.PRODUCTS)
         db.commit()
+        prod_crud.invalidate_product_counts()
     return db_category
@@ -1,19 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from database import get_db
+from database import get_db, get_read_db
 from security import check_admin_role
+import etag
+from product import schemas as product_schemas
+from serialization import JSONSerializer
 from . import crud, schemas
 
 router = APIRouter(prefix="/categories", tags=["Категории"])
 
+_detail_json = JSONSerializer(schemas.CategoryWithProducts)
+
 
 @router.get(
     "/", response_model=List[schemas.Category], description="Получить список категорий"
 )
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_categories(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+):
+    not_modified = etag.conditional_response(
+        request, response, "categories", etag.get_etag(db, etag.CATEGORIES)
+    )
+    if not_modified:
+        return not_modified
     return crud.get_categories(db, skip=skip, limit=limit)
 
 
@@ -32,13 +56,33 @@ def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_
     response_model=schemas.CategoryWithProducts,
     description="Получить информацию о категории",
 )
-def read_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = crud.get_category(db, category_id=category_id)
-    if db_category is None:
+def read_category(
+    category_id: int,
+    limit: int = Query(10, ge=1, le=100, description="Количество товаров на странице"),
+    sort_by: Optional[product_schemas.SortBy] = Query(
+        None, description="Параметр для сортировки товаров"
+    ),
+    sort_order: Optional[product_schemas.SortOrder] = Query(
+        product_schemas.SortOrder.ASC, description="Порядок сортировки"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы товаров"
+    ),
+    db: Session = Depends(get_read_db),
+):
+    category = crud.get_category_detail(
+        db,
+        category_id,
+        limit=limit,
+        sort_by=sort_by.value if sort_by else None,
+        sort_order=sort_order.value if sort_order else "asc",
+        cursor=cursor,
+    )
+    if category is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
         )
-    return db_category
+    return _detail_json.response(category)
 
 
 @router.put(
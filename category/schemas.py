@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
-from product import Product
+from product import ProductPage
 
 
 class CategoryBase(BaseModel):
@@ -33,4 +33,6 @@ class Category(CategoryBase):
 
 
 class CategoryWithProducts(Category):
-    products: Optional[list[Product]]
+    product_count: int
+    in_stock_count: int
+    products: ProductPage
@@ -0,0 +1,58 @@
+import threading
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import etag
+import models
+
+_categories_query = select(models.Category.id, models.Category.name)
+
+
+class CategoryRegistry:
+    """Справочник категорий в памяти процесса (название <-> id).
+
+    Загружается при первом обращении и перечитывается, когда меняется
+    версия таблицы категорий: её увеличивает каждая запись через
+    category.crud, в том числе в других воркерах. Проверка версии - один
+    запрос по первичному ключу.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._ids: dict[str, int] = {}
+        self._names: dict[int, str] = {}
+
+    def _store(self, version: int, rows):
+        names = dict(rows)
+        with self._lock:
+            self._names = names
+            self._ids = {name: category_id for category_id, name in names.items()}
+            self._version = version
+
+    def refresh(self, db: Session) -> "CategoryRegistry":
+        version = etag.get_version(db, etag.CATEGORIES)
+        if version != self._version:
+            self._store(version, db.execute(_categories_query).all())
+        return self
+
+    async def refresh_async(self, db: AsyncSession) -> "CategoryRegistry":
+        version = await etag.get_version_async(db, etag.CATEGORIES)
+        if version != self._version:
+            self._store(version, (await db.execute(_categories_query)).all())
+        return self
+
+    def id_of(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def name_of(self, category_id: int) -> Optional[str]:
+        return self._names.get(category_id)
+
+    def names(self) -> list[str]:
+        return sorted(self._ids)
+
+
+registry = CategoryRegistry()
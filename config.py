@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -6,6 +8,35 @@ class Settings(BaseSettings):
     salt: str
     db_name: str
     token_expire_minutes: int
+    sqlite_profile: Literal["default", "durable", "throughput"] = "durable"
+    sqlite_journal_mode: Optional[str] = None
+    sqlite_synchronous: Optional[str] = None
+    sqlite_mmap_size: Optional[int] = None
+    sqlite_cache_size: Optional[int] = None
+    sqlite_temp_store: Optional[str] = None
+    sqlite_busy_timeout: Optional[int] = None
+    read_routing: bool = True
+    read_db_url: Optional[str] = None
+    read_async_db_url: Optional[str] = None
+    read_pool_size: int = 10
+    read_pool_max_overflow: int = 10
+    count_cache_size: int = 1024
+    count_cache_ttl: int = 300
+    count_estimate_limit: int = 10000
+    facet_price_buckets: list[int] = [1000, 5000, 10000, 50000, 100000]
+    password_hash_executor: Literal["thread", "process"] = "thread"
+    password_hash_workers: int = 2
+    password_hash_queue_size: int = 32
+    principal_cache_size: int = 10000
+    principal_cache_ttl: int = 60
+    import_chunk_size: int = 1000
+    import_max_errors: int = 1000
+    export_batch_size: int = 1000
+    cache_control: dict[str, str] = {
+        "products": "no-cache",
+        "product": "no-cache",
+        "categories": "no-cache",
+    }
 
     class Config:
         env_file = ".env"
@@ -1,16 +1,143 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from config import settings
+import metrics
 
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{settings.db_name}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{settings.db_name}"
+
+# Чтение идёт через отдельные подключения только для чтения к тому же файлу
+# (или к реплике, если задан READ_DB_URL / READ_ASYNC_DB_URL)
+READ_DATABASE_URL = (
+    settings.read_db_url or f"sqlite:///file:{settings.db_name}?mode=ro&uri=true"
+)
+ASYNC_READ_DATABASE_URL = (
+    settings.read_async_db_url
+    or f"sqlite+aiosqlite:///file:{settings.db_name}?mode=ro&uri=true"
+)
+
+# Наборы PRAGMA для SQLite:
+# default    - настройки SQLite без изменений (журнал отката, synchronous=FULL);
+# durable    - WAL: читатели не ждут писателя, каждый commit по-прежнему
+#              синхронизируется с диском (synchronous=FULL);
+# throughput - WAL с synchronous=NORMAL: fsync только при контрольной точке,
+#              при сбое питания могут потеряться последние транзакции, но
+#              база остаётся целой; плюс mmap и увеличенный кэш страниц.
+SQLITE_PROFILES = {
+    "default": {},
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "busy_timeout": 5000,
+    },
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+_PRAGMAS = (
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "temp_store",
+    "busy_timeout",
+)
+
+
+def sqlite_pragmas(profile: str = None) -> dict:
+    """PRAGMA выбранного профиля с учётом отдельных настроек SQLITE_*."""
+    pragmas = dict(SQLITE_PROFILES[profile or settings.sqlite_profile])
+    for name in _PRAGMAS:
+        value = getattr(settings, f"sqlite_{name}")
+        if value is not None:
+            pragmas[name] = value
+    return pragmas
+
+
+def read_only_pragmas(pragmas: dict) -> dict:
+    # Режим журнала хранится в файле базы и меняется только пишущим подключением
+    pragmas = {k: v for k, v in pragmas.items() if k != "journal_mode"}
+    pragmas["query_only"] = 1
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict):
+    """Выполнять PRAGMA на каждом новом подключении движка."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=metrics.timed_pool(QueuePool, "primary"),
 )
+apply_sqlite_pragmas(engine, sqlite_pragmas())
+metrics.instrument_engine(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=metrics.timed_pool(AsyncAdaptedQueuePool, "primary_async"),
+)
+apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+metrics.instrument_engine(async_engine.sync_engine, "primary_async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+if settings.read_routing:
+    read_engine = create_engine(
+        READ_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.read_pool_size,
+        max_overflow=settings.read_pool_max_overflow,
+        poolclass=metrics.timed_pool(QueuePool, "read"),
+    )
+    apply_sqlite_pragmas(read_engine, read_only_pragmas(sqlite_pragmas()))
+    metrics.instrument_engine(read_engine, "read")
+    async_read_engine = create_async_engine(
+        ASYNC_READ_DATABASE_URL,
+        pool_size=settings.read_pool_size,
+        max_overflow=settings.read_pool_max_overflow,
+        poolclass=metrics.timed_pool(AsyncAdaptedQueuePool, "read_async"),
+    )
+    apply_sqlite_pragmas(
+        async_read_engine.sync_engine, read_only_pragmas(sqlite_pragmas())
+    )
+    metrics.instrument_engine(async_read_engine.sync_engine, "read_async")
+else:
+    read_engine, async_read_engine = engine, async_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
@@ -20,3 +147,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_read_async_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+
+PRODUCTS = "products"
+CATEGORIES = "categories"
+
+_versions = models.TableVersion.__table__
+
+
+def bump_version(db: Session, *names: str):
+    """Увеличить версии таблиц в текущей транзакции (до commit)."""
+    statement = insert(_versions).values(
+        [{"name": name, "version": 1} for name in names]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[_versions.c.name],
+            set_={"version": _versions.c.version + 1},
+        )
+    )
+
+
+def _versions_query(names: tuple) -> select:
+    return select(_versions.c.name, _versions.c.version).where(
+        _versions.c.name.in_(names)
+    )
+
+
+def _etag(names: tuple, versions: dict) -> str:
+    return '"' + "-".join(f"{name}.{versions.get(name, 0)}" for name in names) + '"'
+
+
+def get_version(db: Session, name: str) -> int:
+    return dict(db.execute(_versions_query((name,))).all()).get(name, 0)
+
+
+async def get_version_async(db: AsyncSession, name: str) -> int:
+    return dict((await db.execute(_versions_query((name,)))).all()).get(name, 0)
+
+
+def get_etag(db: Session, *names: str) -> str:
+    return _etag(names, dict(db.execute(_versions_query(names)).all()))
+
+
+async def get_etag_async(db: AsyncSession, *names: str) -> str:
+    return _etag(names, dict((await db.execute(_versions_query(names))).all()))
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in header.split(","))
+
+
+def conditional_response(
+    request: Request, response: Response, route: str, etag: str
+) -> Optional[Response]:
+    """Выставить ETag и Cache-Control; вернуть 304, если у клиента актуальная версия."""
+    headers = {"ETag": etag}
+    cache_control = settings.cache_control.get(route)
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if _matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,156 @@
+from datetime import datetime
+from itertools import groupby
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+
+ORDER_ITEM_FIELDS = ("product_id", "product_name", "quantity", "price_at_order")
+
+
+def _apply_range(query, column_id, column_created, date_from, date_to, after_id):
+    if date_from is not None:
+        query = query.where(column_created >= date_from)
+    if date_to is not None:
+        query = query.where(column_created < date_to)
+    if after_id is not None:
+        query = query.where(column_id > after_id)
+    return query
+
+
+def _stream(db: Session, query, batch_size: Optional[int]):
+    # yield_per читает результат порциями через курсор, не загружая его целиком
+    return db.execute(
+        query.execution_options(yield_per=batch_size or settings.export_batch_size)
+    ).mappings()
+
+
+def iter_orders(
+    db: Session,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+    after_id: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[dict]:
+    query = (
+        select(
+            models.Order.id,
+            models.Order.user_id,
+            models.User.username.label("user_name"),
+            models.Order.status,
+            models.Order.amount,
+            models.Order.created_at,
+            models.Order.updated_at,
+            models.OrderItem.product_id,
+            models.Product.name.label("product_name"),
+            models.OrderItem.quantity,
+            models.OrderItem.price_at_order,
+        )
+        .join(models.User, models.User.id == models.Order.user_id, isouter=True)
+        # Внешнее соединение: заказ без позиций (товары удалены) тоже выгружается
+        .join(
+            models.OrderItem,
+            models.OrderItem.order_id == models.Order.id,
+            isouter=True,
+        )
+        .join(
+            models.Product,
+            models.Product.id == models.OrderItem.product_id,
+            isouter=True,
+        )
+        .order_by(models.Order.id, models.OrderItem.product_id)
+    )
+    query = _apply_range(
+        query, models.Order.id, models.Order.created_at, date_from, date_to, after_id
+    )
+    if status is not None:
+        query = query.where(models.Order.status == status)
+
+    rows = _stream(db, query, batch_size)
+    for order_id, lines in groupby(rows, key=lambda row: row["id"]):
+        first = next(lines)
+        yield {
+            "id": order_id,
+            "user_id": first["user_id"],
+            "user_name": first["user_name"],
+            "status": first["status"].value,
+            "amount": first["amount"],
+            "created_at": first["created_at"],
+            "updated_at": first["updated_at"],
+            "items": [
+                {field: line[field] for field in ORDER_ITEM_FIELDS}
+                for line in (first, *lines)
+                if line["product_id"] is not None
+            ],
+        }
+
+
+def iter_products(
+    db: Session,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[dict]:
+    query = (
+        select(
+            models.Product.id,
+            models.Product.name,
+            models.Product.price,
+            models.Product.category_id,
+            models.Category.name.label("category_name"),
+            models.Product.description,
+            models.Product.stock,
+            models.Product.rating_avg.label("rating"),
+            models.Product.rating_count,
+            models.Product.created_at,
+            models.Product.updated_at,
+        )
+        .join(
+            models.Category,
+            models.Category.id == models.Product.category_id,
+            isouter=True,
+        )
+        .order_by(models.Product.id)
+    )
+    query = _apply_range(
+        query,
+        models.Product.id,
+        models.Product.created_at,
+        date_from,
+        date_to,
+        after_id,
+    )
+    for row in _stream(db, query, batch_size):
+        yield dict(row)
+
+
+def iter_reviews(
+    db: Session,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+    after_id: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[dict]:
+    query = select(
+        models.Review.id,
+        models.Review.product_id,
+        models.Review.user_id,
+        models.Review.rating,
+        models.Review.text,
+        models.Review.status,
+        models.Review.created_at,
+        models.Review.updated_at,
+    ).order_by(models.Review.id)
+    query = _apply_range(
+        query, models.Review.id, models.Review.created_at, date_from, date_to, after_id
+    )
+    if status is not None:
+        query = query.where(models.Review.status == status)
+    for row in _stream(db, query, batch_size):
+        yield {**row, "status": row["status"].value}
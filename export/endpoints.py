@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Iterator, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from config import settings
+from database import ReadSessionLocal
+from models import OrderStatus, ReviewStatus
+from security import check_manager_role
+from . import crud, schemas
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Экспорт"],
+    dependencies=[Depends(check_manager_role)],
+)
+
+_MEDIA_TYPES = {
+    schemas.ExportFormat.NDJSON: "application/x-ndjson",
+    schemas.ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unsupported value: {value!r}")
+
+
+def _flatten_order(order: dict) -> Iterator[dict]:
+    header = {key: value for key, value in order.items() if key != "items"}
+    # Заказ без позиций - одна строка с пустыми столбцами позиции
+    for item in order["items"] or [dict.fromkeys(crud.ORDER_ITEM_FIELDS)]:
+        yield {**header, **item}
+
+
+def _ndjson(rows: Iterator[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=_json_default) + "\n"
+
+
+def _csv(rows: Iterator[dict], flatten=None) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        for line in flatten(row) if flatten else (row,):
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(line))
+                writer.writeheader()
+            writer.writerow(line)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _export(
+    name: str,
+    format: schemas.ExportFormat,
+    rows: Callable,
+    flatten: Optional[Callable] = None,
+    **filters,
+) -> StreamingResponse:
+    def content():
+        # Сессия принадлежит генератору: он выполняется уже после выхода
+        # из эндпоинта, пока ответ отправляется клиенту
+        db = ReadSessionLocal()
+        try:
+            if format == schemas.ExportFormat.CSV:
+                lines = _csv(rows(db, **filters), flatten)
+            else:
+                lines = _ndjson(rows(db, **filters))
+            chunk = []
+            for line in lines:
+                chunk.append(line)
+                if len(chunk) >= settings.export_batch_size:
+                    yield "".join(chunk)
+                    chunk.clear()
+            yield "".join(chunk)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        content(),
+        media_type=_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{format.value}"'
+        },
+    )
+
+
+@router.get(
+    "/orders",
+    description="Выгрузить заказы в NDJSON или CSV потоком (только для менеджера и администратора)",
+)
+def export_orders(
+    format: schemas.ExportFormat = Query(
+        schemas.ExportFormat.NDJSON, description="Формат выгрузки"
+    ),
+    date_from: Optional[datetime] = Query(
+        None, description="Заказы, созданные не раньше"
+    ),
+    date_to: Optional[datetime] = Query(None, description="Заказы, созданные раньше"),
+    status: Optional[OrderStatus] = Query(None, description="Фильтр по статусу"),
+    after_id: Optional[int] = Query(
+        None, description="Продолжить выгрузку после заказа с этим id"
+    ),
+):
+    return _export(
+        "orders",
+        format,
+        crud.iter_orders,
+        _flatten_order,
+        date_from=date_from,
+        date_to=date_to,
+        status=status,
+        after_id=after_id,
+    )
+
+
+@router.get(
+    "/products",
+    description="Выгрузить товары в NDJSON или CSV потоком (только для менеджера и администратора)",
+)
+def export_products(
+    format: schemas.ExportFormat = Query(
+        schemas.ExportFormat.NDJSON, description="Формат выгрузки"
+    ),
+    date_from: Optional[datetime] = Query(
+        None, description="Товары, созданные не раньше"
+    ),
+    date_to: Optional[datetime] = Query(None, description="Товары, созданные раньше"),
+    after_id: Optional[int] = Query(
+        None, description="Продолжить выгрузку после товара с этим id"
+    ),
+):
+    return _export(
+        "products",
+        format,
+        crud.iter_products,
+        date_from=date_from,
+        date_to=date_to,
+        after_id=after_id,
+    )
+
+
+@router.get(
+    "/reviews",
+    description="Выгрузить отзывы в NDJSON или CSV потоком (только для менеджера и администратора)",
+)
+def export_reviews(
+    format: schemas.ExportFormat = Query(
+        schemas.ExportFormat.NDJSON, description="Формат выгрузки"
+    ),
+    date_from: Optional[datetime] = Query(
+        None, description="Отзывы, созданные не раньше"
+    ),
+    date_to: Optional[datetime] = Query(None, description="Отзывы, созданные раньше"),
+    status: Optional[ReviewStatus] = Query(None, description="Фильтр по статусу"),
+    after_id: Optional[int] = Query(
+        None, description="Продолжить выгрузку после отзыва с этим id"
+    ),
+):
+    return _export(
+        "reviews",
+        format,
+        crud.iter_reviews,
+        date_from=date_from,
+        date_to=date_to,
+        status=status,
+        after_id=after_id,
+    )
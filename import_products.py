@@ -0,0 +1,49 @@
+import argparse
+import sys
+
+from database import SessionLocal
+from product.importer import import_products
+from product.schemas import ImportFormat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Массовый импорт товаров из CSV или NDJSON (ключ - название товара)"
+    )
+    parser.add_argument("path", help="Путь к файлу фида")
+    parser.add_argument(
+        "--format",
+        choices=[f.value for f in ImportFormat],
+        help="Формат файла (по умолчанию определяется по расширению)",
+    )
+    parser.add_argument("--chunk-size", type=int, help="Строк в одном пакете записи")
+    args = parser.parse_args()
+
+    format = args.format or (
+        ImportFormat.NDJSON
+        if args.path.endswith((".ndjson", ".jsonl"))
+        else ImportFormat.CSV
+    )
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_products(
+                db, stream, ImportFormat(format), chunk_size=args.chunk_size
+            )
+    finally:
+        db.close()
+
+    print(
+        f"Обработано строк: {report['processed']}, добавлено: {report['created']}, "
+        f"обновлено: {report['updated']}, с ошибками: {report['failed']}"
+    )
+    for error in report["errors"]:
+        print(f"  строка {error['line']}: {error['message']}")
+    if report["errors_truncated"]:
+        print("  ... (список ошибок сокращён)")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
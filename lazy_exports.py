@@ -0,0 +1,43 @@
+import importlib
+import importlib.util
+
+
+def lazy_exports(package: str, submodules: tuple):
+    """__getattr__ и __dir__ для пакета, который раньше делал
+    `from .submodule import *` для каждого модуля из submodules.
+
+    Модули импортируются при первом обращении к имени, поэтому импорт
+    `product.crud` не загружает эндпоинты пакета и то, что нужно только им
+    (security, bcrypt). FastAPI и prometheus_client при этом загружаются:
+    их импортируют etag, pagination и database. Порядок поиска обратный
+    порядку звёздочных импортов: как и раньше, имя из более позднего модуля
+    перекрывает имя из более раннего.
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def _public(module) -> list:
+        names = getattr(module, "__all__", None)
+        if names is None:
+            names = [name for name in vars(module) if not name.startswith("_")]
+        return names
+
+    def __getattr__(name: str):
+        # `from . import schemas` должен получить сам подмодуль
+        if importlib.util.find_spec(f"{package}.{name}") is not None:
+            return importlib.import_module(f"{package}.{name}")
+        if not name.startswith("_"):
+            for submodule in reversed(submodules):
+                module = importlib.import_module(f"{package}.{submodule}")
+                if name in _public(module):
+                    value = getattr(module, name)
+                    namespace[name] = value
+                    return value
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+    def __dir__() -> list:
+        names = set(namespace)
+        for submodule in submodules:
+            names.update(_public(importlib.import_module(f"{package}.{submodule}")))
+        return sorted(names)
+
+    return __getattr__, __dir__
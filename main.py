@@ -1,19 +1,15 @@
-from fastapi import FastAPI, Depends, APIRouter
+from fastapi import FastAPI, Depends, Response
 from security import get_current_user
-import auth, category, product, review, user, order
+import metrics
+import analytics, auth, category, export, product, review, user, order
 
 app = FastAPI(title="API Магазина электроники", version="1.0.0")
+app.add_middleware(metrics.MetricsMiddleware)
 
-api_router = APIRouter(prefix="/api")
-
-api_router.include_router(auth.router)
-api_router.include_router(product.router)
-api_router.include_router(category.router)
-api_router.include_router(order.router)
-api_router.include_router(review.router)
-api_router.include_router(user.router)
-
-app.include_router(api_router)
+# Роутеры подключаются к приложению напрямую: каждое include_router
+# пересоздаёт маршруты, и промежуточный APIRouter удваивал эту работу
+for module in (auth, product, category, order, review, user, export, analytics):
+    app.include_router(module.router, prefix="/api")
 
 
 @app.get("/")
@@ -24,3 +20,9 @@ def root():
 @app.get("/secure", dependencies=[Depends(get_current_user)])
 async def secure_endpoint():
     return {"message": "Вы вошли на защищенный эндпоинт"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    content, media_type = metrics.render()
+    return Response(content, media_type=media_type)
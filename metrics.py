@@ -0,0 +1,210 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PASSWORD_HASH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5, 5.0)
+REQUEST_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+password_hash_queue_wait = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Время ожидания задачи bcrypt в очереди пула",
+    ["operation"],
+    buckets=PASSWORD_HASH_BUCKETS,
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Время вычисления bcrypt",
+    ["operation"],
+    buckets=PASSWORD_HASH_BUCKETS,
+)
+password_hash_rejected = Counter(
+    "password_hash_rejected_total",
+    "Задачи bcrypt, отклонённые из-за переполнения очереди",
+    ["operation"],
+)
+
+http_requests = Counter(
+    "http_requests_total",
+    "Обработанные HTTP-запросы",
+    ["method", "route", "status"],
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "Число SQL-запросов на один HTTP-запрос",
+    ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Суммарное время SQL-запросов одного HTTP-запроса",
+    ["method", "route"],
+    buckets=REQUEST_BUCKETS,
+)
+
+db_pool_checkouts = Counter(
+    "db_pool_checkouts_total",
+    "Выдачи соединений из пула",
+    ["pool"],
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Время ожидания соединения из пула",
+    ["pool"],
+    buckets=POOL_WAIT_BUCKETS,
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Соединения, выданные из пула в данный момент",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Число и суммарное время SQL-запросов текущего HTTP-запроса. ContextVar
+# доступен и в потоках threadpool, где выполняются синхронные эндпоинты
+_request_state: ContextVar[Optional[list]] = ContextVar(
+    "metrics_request_state", default=None
+)
+
+
+def timed_pool(pool_class: type, name: str) -> type:
+    """Класс пула, публикующий число выдач соединений и время их ожидания."""
+
+    class TimedPool(pool_class):
+        def connect(self):
+            started = time.perf_counter()
+            connection = super().connect()
+            db_pool_checkout_wait.labels(name).observe(time.perf_counter() - started)
+            db_pool_checkouts.labels(name).inc()
+            return connection
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Учитывать выданные соединения пула и SQL-запросы HTTP-запросов."""
+    checked_out = db_pool_checked_out.labels(name)
+    event.listen(engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(engine, "checkin", lambda *args: checked_out.dec())
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        if _request_state.get() is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        state = _request_state.get()
+        started = getattr(context, "_metrics_started", None)
+        if state is not None and started is not None:
+            state[0] += 1
+            state[1] += time.perf_counter() - started
+
+
+def _route_template(scope: dict) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Маршруты Starlette без шаблона (документация) - по фактическому пути
+    if scope.get("endpoint") is not None:
+        return scope["path"]
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: число, время и SQL-нагрузка запросов по шаблону маршрута.
+
+    Метка route - шаблон пути (/api/products/{product_id}), а не фактический
+    путь, поэтому число временных рядов не зависит от идентификаторов в URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        state = [0, 0.0]
+        token = _request_state.set(state)
+        in_progress = http_requests_in_progress.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            in_progress.dec()
+            _request_state.reset(token)
+            route = _route_template(scope)
+            status = str(status_code)
+            http_requests.labels(method, route, status).inc()
+            http_request_duration.labels(method, route, status).observe(duration)
+            http_request_db_queries.labels(method, route).observe(state[0])
+            http_request_db_duration.labels(method, route).observe(state[1])
+
+
+def render() -> tuple[bytes, str]:
+    """Метрики в текстовом формате Prometheus.
+
+    При заданном PROMETHEUS_MULTIPROC_DIR значения собираются из файлов всех
+    воркеров, иначе - из реестра текущего процесса.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
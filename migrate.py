@@ -0,0 +1,50 @@
+import argparse
+import sys
+
+from database import engine
+import migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы базы данных")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Применить миграции")
+    upgrade_parser.add_argument(
+        "--target", type=int, default=None, help="Версия, до которой применить"
+    )
+    subparsers.add_parser("status", help="Показать применённые и ожидающие миграции")
+    subparsers.add_parser(
+        "check-plans",
+        help="Проверить, что горячие запросы не выполняют полный просмотр таблиц",
+    )
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = migrations.upgrade(engine, target=args.target)
+        for version, name in applied:
+            print(f"Применена миграция {version:04d}_{name}")
+        if not applied:
+            print("Схема базы данных актуальна.")
+        return 0
+
+    if args.command == "status":
+        applied = migrations.applied_versions(engine)
+        for version, name, _ in migrations.load_migrations():
+            mark = "x" if version in applied else " "
+            print(f"[{mark}] {version:04d}_{name}")
+        return 0
+
+    from migrations.plans import check_query_plans
+
+    failures = check_query_plans(engine)
+    for name, scan, statement in failures:
+        print(f"{name}: {scan}\n    {' '.join(statement.split())}")
+    if failures:
+        print(f"Полный просмотр таблиц в горячих запросах: {len(failures)}")
+        return 1
+    print("Все горячие запросы используют индексы.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import importlib
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect
+from sqlalchemy.engine import Connection, Engine
+
+from . import versions
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def load_migrations() -> list:
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        version, _, name = module_info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append((int(version), name, module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def has_column(connection: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(connection).get_columns(table))
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        rows = connection.execute(schema_migrations.select())
+        return {row.version for row in rows}
+
+
+def pending_migrations(engine: Engine) -> list:
+    applied = applied_versions(engine)
+    return [m for m in load_migrations() if m[0] not in applied]
+
+
+def upgrade(engine: Engine, target: int = None) -> list:
+    applied = []
+    for version, name, module in pending_migrations(engine):
+        if target is not None and version > target:
+            break
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(
+                schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.now()
+                )
+            )
+        applied.append((version, name))
+    return applied
+
+
+def reset(engine: Engine):
+    from database import Base
+    import models  # noqa: F401
+
+    Base.metadata.drop_all(bind=engine)
+    metadata.drop_all(bind=engine)
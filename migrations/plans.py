@@ -0,0 +1,108 @@
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import models
+from database import Base
+from order import crud as order_crud
+from product import crud as prod_crud
+from review import crud as review_crud
+
+
+def _first_id(db: Session, model) -> int:
+    return db.scalar(select(model.id).limit(1)) or 1
+
+
+# Горячие запросы приложения: каждый вызов выполняется, а все выданные им
+# SELECT проверяются через EXPLAIN QUERY PLAN
+HOT_QUERIES = [
+    (
+        "products by category",
+        lambda db: prod_crud.get_products(db, category="Смартфоны", exact_total=True),
+    ),
+    (
+        "products by price range sorted by price",
+        lambda db: prod_crud.get_products(
+            db, min_price=1000, max_price=50000, sort_by="price"
+        ),
+    ),
+    (
+        "products by category sorted by price",
+        lambda db: prod_crud.get_products(db, category="Ноутбуки", sort_by="price"),
+    ),
+    (
+        "products sorted by rating",
+        lambda db: prod_crud.get_products(db, sort_by="rating", sort_order="desc"),
+    ),
+    (
+        "products full-text search",
+        lambda db: prod_crud.get_products(db, name="смартфон", sort_by="relevance"),
+    ),
+    (
+        "approved reviews of product",
+        lambda db: review_crud.get_reviews(
+            db,
+            product_id=_first_id(db, models.Product),
+            status=models.ReviewStatus.APPROVED,
+        ),
+    ),
+    (
+        "review moderation queue",
+        lambda db: review_crud.get_moderation_queue(db),
+    ),
+    (
+        "orders of user",
+        lambda db: order_crud.get_orders(db, user_id=_first_id(db, models.User)),
+    ),
+    (
+        "order items of product",
+        lambda db: db.get(models.Product, _first_id(db, models.Product)).order_items,
+    ),
+    (
+        "reviews of user",
+        lambda db: db.get(models.User, _first_id(db, models.User)).reviews,
+    ),
+]
+
+
+def _full_scans(plan: list, tables: set) -> list:
+    scans = []
+    for detail in plan:
+        words = detail.split()
+        if len(words) < 2 or words[0] != "SCAN":
+            continue
+        table = words[2] if words[1] == "TABLE" else words[1]
+        if table in tables and "USING" not in words:
+            scans.append(detail)
+    return scans
+
+
+def check_query_plans(engine: Engine) -> list:
+    prod_crud.invalidate_product_counts()
+    tables = set(Base.metadata.tables)
+    failures = []
+    for name, run in HOT_QUERIES:
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        with Session(bind=engine) as db:
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                run(db)
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+            connection = db.connection()
+            for statement, parameters in statements:
+                plan = [
+                    row[-1]
+                    for row in connection.exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", parameters
+                    )
+                ]
+                for scan in _full_scans(plan, tables):
+                    failures.append((name, scan, statement))
+            db.rollback()
+    return failures
@@ -0,0 +1,91 @@
+# Исходная схема. IF NOT EXISTS позволяет зарегистрировать базы, созданные
+# до появления миграций через Base.metadata.create_all.
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_categories_id ON categories (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_categories_name ON categories (name)",
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        username VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        hashed_password VARCHAR NOT NULL,
+        role VARCHAR(7) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+    """
+    CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        amount NUMERIC(12, 2) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_orders_id ON orders (id)",
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        price NUMERIC(12, 2) NOT NULL,
+        category_id INTEGER NOT NULL,
+        description VARCHAR,
+        stock INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(category_id) REFERENCES categories (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_id ON products (id)",
+    "CREATE INDEX IF NOT EXISTS ix_products_name ON products (name)",
+    """
+    CREATE TABLE IF NOT EXISTS order_items (
+        order_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        price_at_order NUMERIC(12, 2) NOT NULL,
+        PRIMARY KEY (order_id, product_id),
+        FOREIGN KEY(order_id) REFERENCES orders (id) ON DELETE CASCADE,
+        FOREIGN KEY(product_id) REFERENCES products (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS reviews (
+        id INTEGER NOT NULL,
+        product_id INTEGER,
+        user_id INTEGER,
+        rating INTEGER NOT NULL,
+        text VARCHAR NOT NULL,
+        status VARCHAR(8) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(product_id) REFERENCES products (id) ON DELETE CASCADE,
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_reviews_id ON reviews (id)",
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,45 @@
+from migrations import has_column
+
+COLUMNS = [
+    ("rating_sum", "INTEGER DEFAULT '0' NOT NULL"),
+    ("rating_count", "INTEGER DEFAULT '0' NOT NULL"),
+    ("rating_avg", "FLOAT DEFAULT '0' NOT NULL"),
+    ("rating_1", "INTEGER DEFAULT '0' NOT NULL"),
+    ("rating_2", "INTEGER DEFAULT '0' NOT NULL"),
+    ("rating_3", "INTEGER DEFAULT '0' NOT NULL"),
+    ("rating_4", "INTEGER DEFAULT '0' NOT NULL"),
+    ("rating_5", "INTEGER DEFAULT '0' NOT NULL"),
+]
+
+# Заполнение агрегатов по уже существующим одобренным отзывам
+BACKFILL = """
+    UPDATE products SET
+        rating_sum = (
+            SELECT coalesce(sum(rating), 0) FROM reviews
+            WHERE product_id = products.id AND status = 'APPROVED'
+        ),
+        rating_count = (
+            SELECT count(*) FROM reviews
+            WHERE product_id = products.id AND status = 'APPROVED'
+        ),
+        rating_avg = coalesce((
+            SELECT avg(rating) FROM reviews
+            WHERE product_id = products.id AND status = 'APPROVED'
+        ), 0),
+        {histogram}
+"""
+
+
+def upgrade(connection):
+    for name, definition in COLUMNS:
+        if not has_column(connection, "products", name):
+            connection.exec_driver_sql(
+                f"ALTER TABLE products ADD COLUMN {name} {definition}"
+            )
+    histogram = ",\n".join(
+        f"rating_{star} = (SELECT count(*) FROM reviews "
+        f"WHERE product_id = products.id AND status = 'APPROVED' "
+        f"AND rating = {star})"
+        for star in range(1, 6)
+    )
+    connection.exec_driver_sql(BACKFILL.format(histogram=histogram))
@@ -0,0 +1,27 @@
+# SQL зафиксирован в миграции: последующие изменения models.py не должны
+# менять то, что делает уже выпущенная миграция
+STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) "
+    "VALUES (new.id, replace(replace(new.name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е')); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "DELETE FROM products_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au "
+    "AFTER UPDATE OF name, description ON products BEGIN "
+    "DELETE FROM products_fts WHERE rowid = old.id; "
+    "INSERT INTO products_fts(rowid, name, description) "
+    "VALUES (new.id, replace(replace(new.name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е')); END",
+    "DELETE FROM products_fts",
+    "INSERT INTO products_fts(rowid, name, description) "
+    "SELECT id, replace(replace(name, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(description, 'ё', 'е'), 'Ё', 'Е') FROM products",
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,19 @@
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_products_category_price "
+    "ON products (category_id, price)",
+    "CREATE INDEX IF NOT EXISTS ix_products_price ON products (price)",
+    "CREATE INDEX IF NOT EXISTS ix_products_stock ON products (stock)",
+    "CREATE INDEX IF NOT EXISTS ix_products_rating_avg ON products (rating_avg)",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_product_status "
+    "ON reviews (product_id, status)",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_user_id ON reviews (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_user_created "
+    "ON orders (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_order_items_product_id "
+    "ON order_items (product_id)",
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,14 @@
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        name VARCHAR NOT NULL,
+        version INTEGER DEFAULT '0' NOT NULL,
+        PRIMARY KEY (name)
+    )
+    """,
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
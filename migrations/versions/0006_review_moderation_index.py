@@ -0,0 +1,9 @@
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_reviews_status_created "
+    "ON reviews (status, created_at)",
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,17 @@
+from migrations import has_column
+
+# Число позиций заказа хранится в самом заказе, чтобы краткий список заказов
+# не обращался к order_items
+BACKFILL = """
+    UPDATE orders SET item_count = (
+        SELECT count(*) FROM order_items WHERE order_id = orders.id
+    )
+"""
+
+
+def upgrade(connection):
+    if not has_column(connection, "orders", "item_count"):
+        connection.exec_driver_sql(
+            "ALTER TABLE orders ADD COLUMN item_count INTEGER DEFAULT '0' NOT NULL"
+        )
+    connection.exec_driver_sql(BACKFILL)
@@ -0,0 +1,73 @@
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS sales_daily (
+        day DATE NOT NULL,
+        orders INTEGER DEFAULT '0' NOT NULL,
+        units INTEGER DEFAULT '0' NOT NULL,
+        revenue NUMERIC(14, 2) DEFAULT '0' NOT NULL,
+        PRIMARY KEY (day)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sales_product_daily (
+        day DATE NOT NULL,
+        product_id INTEGER NOT NULL,
+        units INTEGER DEFAULT '0' NOT NULL,
+        revenue NUMERIC(14, 2) DEFAULT '0' NOT NULL,
+        PRIMARY KEY (day, product_id),
+        FOREIGN KEY(product_id) REFERENCES products (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sales_category_daily (
+        day DATE NOT NULL,
+        category_id INTEGER NOT NULL,
+        units INTEGER DEFAULT '0' NOT NULL,
+        revenue NUMERIC(14, 2) DEFAULT '0' NOT NULL,
+        PRIMARY KEY (day, category_id),
+        FOREIGN KEY(category_id) REFERENCES categories (id) ON DELETE CASCADE
+    )
+    """,
+]
+
+
+# Заполнение витрин по уже существующим неотменённым заказам
+BACKFILL = [
+    "DELETE FROM sales_daily",
+    "DELETE FROM sales_product_daily",
+    "DELETE FROM sales_category_daily",
+    """
+    INSERT INTO sales_daily (day, orders, units, revenue)
+    SELECT date(orders.created_at), count(DISTINCT orders.id),
+        sum(order_items.quantity),
+        sum(order_items.quantity * order_items.price_at_order)
+    FROM orders JOIN order_items ON order_items.order_id = orders.id
+    WHERE orders.status != 'CANCELLED'
+    GROUP BY date(orders.created_at)
+    """,
+    """
+    INSERT INTO sales_product_daily (day, product_id, units, revenue)
+    SELECT date(orders.created_at), order_items.product_id,
+        sum(order_items.quantity),
+        sum(order_items.quantity * order_items.price_at_order)
+    FROM orders JOIN order_items ON order_items.order_id = orders.id
+    WHERE orders.status != 'CANCELLED'
+    GROUP BY date(orders.created_at), order_items.product_id
+    """,
+    """
+    INSERT INTO sales_category_daily (day, category_id, units, revenue)
+    SELECT date(orders.created_at), products.category_id,
+        sum(order_items.quantity),
+        sum(order_items.quantity * order_items.price_at_order)
+    FROM orders
+    JOIN order_items ON order_items.order_id = orders.id
+    JOIN products ON products.id = order_items.product_id
+    WHERE orders.status != 'CANCELLED'
+    GROUP BY date(orders.created_at), products.category_id
+    """,
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS + BACKFILL:
+        connection.exec_driver_sql(statement)
@@ -1,12 +1,16 @@
 from sqlalchemy import (
+    DDL,
     Column,
     Integer,
     String,
     ForeignKey,
+    Date,
     DateTime,
     Enum,
     Numeric,
-    select,
+    Float,
+    Index,
+    event,
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -71,6 +75,12 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_category_price", "category_id", "price"),
+        Index("ix_products_price", "price"),
+        Index("ix_products_stock", "stock"),
+        Index("ix_products_rating_avg", "rating_avg"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
@@ -80,6 +90,14 @@ class Product(Base):
     )
     description = Column(String)
     stock = Column(Integer)
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_avg = Column(Float, default=0.0, server_default="0", nullable=False)
+    rating_1 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_2 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_3 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_4 = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_5 = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -99,25 +117,22 @@ class Product(Base):
 
     @hybrid_property
     def rating(self):
-        approved_reviews = [
-            r for r in self.reviews if r.status == ReviewStatus.APPROVED
-        ]
-        if not approved_reviews:
-            return 0.0
-        return sum(review.rating for review in approved_reviews) / len(approved_reviews)
-
-    @rating.expression
-    def rating(cls):
-        return (
-            select(func.avg(Review.rating))
-            .where(Review.product_id == cls.id)
-            .where(Review.status == ReviewStatus.APPROVED)
-            .scalar_subquery()
-        )
+        # Агрегаты поддерживаются review.crud, учитываются только одобренные отзывы
+        return self.rating_avg
+
+    @property
+    def rating_histogram(self):
+        return {star: getattr(self, f"rating_{star}") for star in range(1, 6)}
+
+
+# Полнотекстовый индекс products_fts и его триггеры создаются миграцией 0003;
+# при сбросе схемы он удаляется вместе с таблицей товаров
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts"))
 
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_user_created", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
@@ -125,6 +140,7 @@ class Order(Base):
     )
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
+    item_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -142,6 +158,7 @@ class Order(Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (Index("ix_order_items_product_id", "product_id"),)
 
     order_id = Column(
         Integer, ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True
@@ -151,6 +168,9 @@ class OrderItem(Base):
     )
     quantity = Column(Integer, default=1, nullable=False)
     price_at_order = Column(Numeric(12, 2), nullable=False)
+    # Категория товара на момент заказа: витрина продаж по категориям не
+    # меняется, если товар потом перенесут в другую категорию
+    category_id = Column(Integer)
 
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
@@ -162,6 +182,11 @@ class OrderItem(Base):
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_product_status", "product_id", "status"),
+        Index("ix_reviews_user_id", "user_id"),
+        Index("ix_reviews_status_created", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"))
@@ -184,3 +209,49 @@ class Review(Base):
     @property
     def product_name(self):
         return self.product.name if self.product else None
+
+
+class TableVersion(Base):
+    """Счётчик изменений таблицы, из которого строятся ETag каталога."""
+
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0, server_default="0", nullable=False)
+
+
+class DailySales(Base):
+    """Выручка и продажи за день по неотменённым заказам."""
+
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, default=0, server_default="0", nullable=False)
+    units = Column(Integer, default=0, server_default="0", nullable=False)
+    revenue = Column(Numeric(14, 2), default=0, server_default="0", nullable=False)
+
+
+class ProductSales(Base):
+    """Проданные единицы и выручка товара за день."""
+
+    __tablename__ = "sales_product_daily"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    units = Column(Integer, default=0, server_default="0", nullable=False)
+    revenue = Column(Numeric(14, 2), default=0, server_default="0", nullable=False)
+
+
+class CategorySales(Base):
+    """Проданные единицы и выручка категории за день."""
+
+    __tablename__ = "sales_category_daily"
+
+    day = Column(Date, primary_key=True)
+    category_id = Column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    units = Column(Integer, default=0, server_default="0", nullable=False)
+    revenue = Column(Numeric(14, 2), default=0, server_default="0", nullable=False)
@@ -1,58 +1,244 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from typing import Optional
 from . import schemas
 import models
+from pagination import apply_keyset
 from product import crud as prod_crud
+from analytics import crud as analytics_crud
+import etag
 
 
-def get_order(db: Session, order_id: int):
-    return db.query(models.Order).filter(models.Order.id == order_id).first()
+def _order_with_items():
+    # Покупатель подгружается в том же запросе, позиции с названиями товаров -
+    # одним дополнительным запросом на всю страницу заказов
+    return select(models.Order).options(
+        joinedload(models.Order.user).load_only(models.User.username),
+        selectinload(models.Order.items)
+        .joinedload(models.OrderItem.product)
+        .load_only(models.Product.name),
+    )
 
 
-def get_orders(db: Session, user_id: int = None, skip: int = 0, limit: int = 100):
-    query = db.query(models.Order)
+def _paged(query, user_id: Optional[int], skip: int, limit: int, cursor):
     if user_id:
-        query = query.filter(models.Order.user_id == user_id)
-    return query.offset(skip).limit(limit).all()
+        query = query.where(models.Order.user_id == user_id)
+    query = apply_keyset(query, [models.Order.id], "id:asc", cursor, False)
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
 
 
-def create_order(db: Session, order: schemas.OrderCreate, user_id: int):
-    db_order = models.Order(
-        user_id=user_id, status=models.OrderStatus.PENDING, amount=0
+def get_order(db: Session, order_id: int):
+    return db.scalar(_order_with_items().where(models.Order.id == order_id))
+
+
+def get_orders(
+    db: Session,
+    user_id: int = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    return db.scalars(_paged(_order_with_items(), user_id, skip, limit, cursor)).all()
+
+
+def get_order_summaries(
+    db: Session,
+    user_id: int = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> list[dict]:
+    """Заголовки заказов с числом позиций одним запросом, без order_items."""
+    query = select(
+        models.Order.id,
+        models.Order.status,
+        models.Order.user_id,
+        models.User.username.label("user_name"),
+        models.Order.amount,
+        models.Order.item_count,
+        models.Order.created_at,
+        models.Order.updated_at,
+    ).join(models.User, models.User.id == models.Order.user_id)
+    rows = db.execute(_paged(query, user_id, skip, limit, cursor)).mappings()
+    return [dict(row) for row in rows]
+
+
+def order_row(order: models.Order) -> dict:
+    # Порядок ключей совпадает с порядком полей схемы Order
+    return {
+        "id": order.id,
+        "status": order.status,
+        "user_id": order.user_id,
+        "user_name": order.user_name,
+        "amount": order.amount,
+        "created_at": order.created_at,
+        "updated_at": order.updated_at,
+        "items": [
+            {
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "product_name": item.product_name,
+                "price_at_order": item.price_at_order,
+            }
+            for item in order.items
+        ],
+    }
+
+
+class UnknownProductsError(Exception):
+    def __init__(self, product_ids: list[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Products not found: {', '.join(map(str, product_ids))}")
+
+
+class InsufficientStockError(Exception):
+    def __init__(self, product_ids: list[int]):
+        self.product_ids = product_ids
+        super().__init__(
+            f"Insufficient stock for products: {', '.join(map(str, product_ids))}"
+        )
+
+
+_products = models.Product.__table__
+
+# Условное списание: строка меняется, только если остатка хватает, поэтому
+# параллельные заказы не могут продать больше, чем есть на складе
+_reserve_stock = (
+    update(_products)
+    .where(
+        _products.c.id == bindparam("item_product_id"),
+        _products.c.stock >= bindparam("item_quantity"),
+    )
+    .values(stock=_products.c.stock - bindparam("item_quantity"))
+)
+_release_stock = (
+    update(_products)
+    .where(_products.c.id == bindparam("item_product_id"))
+    .values(stock=_products.c.stock + bindparam("item_quantity"))
+)
+
+
+def _stock_params(quantities: dict[int, int]) -> list[dict]:
+    return [
+        {"item_product_id": product_id, "item_quantity": quantity}
+        for product_id, quantity in quantities.items()
+    ]
+
+
+def _reserve(db: Session, quantities: dict[int, int]):
+    reserved = db.execute(_reserve_stock, _stock_params(quantities)).rowcount
+    if reserved == len(quantities):
+        return
+    db.rollback()
+    stock = dict(
+        db.execute(
+            select(models.Product.id, models.Product.stock).where(
+                models.Product.id.in_(quantities)
+            )
+        ).all()
+    )
+    missing = sorted(set(quantities) - set(stock))
+    if missing:
+        raise UnknownProductsError(missing)
+    raise InsufficientStockError(
+        sorted(
+            product_id
+            for product_id, quantity in quantities.items()
+            if (stock[product_id] or 0) < quantity
+        )
     )
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
 
-    amount = 0
+
+def create_order(db: Session, order: schemas.OrderCreate, user_id: int):
+    quantities: dict[int, int] = {}
     for item in order.items:
-        price_at_order = prod_crud.get_product(db, item.product_id).price
-        db_item = models.OrderItem(
-            order_id=db_order.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            price_at_order=price_at_order,
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    _reserve(db, quantities)
+    products = {
+        product.id: product
+        for product in db.scalars(
+            select(models.Product).where(models.Product.id.in_(quantities))
         )
-        amount += price_at_order * item.quantity
-        db.add(db_item)
+    }
 
-    db_order.amount = amount
+    items = [
+        models.OrderItem(
+            product_id=product_id,
+            quantity=quantity,
+            price_at_order=products[product_id].price,
+            category_id=products[product_id].category_id,
+        )
+        for product_id, quantity in quantities.items()
+    ]
+    db_order = models.Order(
+        user_id=user_id,
+        status=models.OrderStatus.PENDING,
+        amount=sum(item.price_at_order * item.quantity for item in items),
+        item_count=len(items),
+        items=items,
+    )
+    db.add(db_order)
+    db.flush()
+    analytics_crud.record_order(db, db_order.id)
+    etag.bump_version(db, etag.PRODUCTS)
+    sold_out = any(product.stock == 0 for product in products.values())
     db.commit()
-    db.refresh(db_order)
-    return db_order
+    if sold_out:
+        prod_crud.invalidate_product_counts()
+    return db.scalar(_order_with_items().where(models.Order.id == db_order.id))
 
 
 def update_order_status(db: Session, order_id: int, status: str):
     db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
     if db_order:
+        was_cancelled = db_order.status == models.OrderStatus.CANCELLED
+        cancelled = status == models.OrderStatus.CANCELLED
+        if was_cancelled != cancelled:
+            # Позиции удалённых товаров удаляются вместе с ними: у заказа может
+            # не остаться товаров, остаток которых нужно менять
+            quantities = {item.product_id: item.quantity for item in db_order.items}
+            if quantities and cancelled:
+                db.execute(_release_stock, _stock_params(quantities))
+            elif quantities:
+                _reserve(db, quantities)
+            # Отмена вычитает заказ из витрин продаж, возврат из отмены - добавляет
+            analytics_crud.record_order(db, order_id, -1 if cancelled else 1)
+            etag.bump_version(db, etag.PRODUCTS)
         db_order.status = status
         db.commit()
-        db.refresh(db_order)
+        if was_cancelled != cancelled:
+            prod_crud.invalidate_product_counts()
+        db_order = get_order(db, order_id)
     return db_order
 
 
+def release_order(db: Session, db_order: models.Order) -> bool:
+    """Подготовить неотменённый заказ к удалению.
+
+    Товары возвращаются на склад, как при отмене, а заказ вычитается из
+    витрин продаж. Выполняется в транзакции вызывающего кода; после фиксации
+    нужно сбросить кэш счётчиков товаров. Возвращает False для отменённого
+    заказа - с ним ничего делать не нужно.
+    """
+    if db_order.status == models.OrderStatus.CANCELLED:
+        return False
+    quantities = {item.product_id: item.quantity for item in db_order.items}
+    if quantities:
+        db.execute(_release_stock, _stock_params(quantities))
+    analytics_crud.record_order(db, db_order.id, -1)
+    etag.bump_version(db, etag.PRODUCTS)
+    return True
+
+
 def delete_order(db: Session, order_id: int):
     db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
     if db_order:
+        active = release_order(db, db_order)
         db.delete(db_order)
         db.commit()
+        if active:
+            prod_crud.invalidate_product_counts()
     return db_order
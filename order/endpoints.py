@@ -1,54 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from database import get_db
-from security import get_current_user, check_manager_role
+from pagination import set_next_cursor_header
+from serialization import JSONSerializer
+from security import Principal, get_current_user, check_manager_role
 from . import crud, schemas
-from models import User, UserRole, OrderStatus
+from models import UserRole, OrderStatus
 
 router = APIRouter(prefix="/orders", tags=["Заказы"])
 
+_orders_json = JSONSerializer(List[schemas.Order])
+_summaries_json = JSONSerializer(List[schemas.OrderSummary])
+
+_view_query = Query(
+    schemas.OrderView.FULL,
+    description="full - заказы с позициями, summary - только заголовки и число позиций",
+)
+
+
+def _orders_response(
+    db: Session,
+    response: Response,
+    view: schemas.OrderView,
+    user_id: Optional[int],
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+) -> Response:
+    if view == schemas.OrderView.SUMMARY:
+        summaries = crud.get_order_summaries(
+            db, user_id=user_id, skip=skip, limit=limit, cursor=cursor
+        )
+        set_next_cursor_header(response, summaries, limit)
+        return _summaries_json.response(summaries, response)
+    orders = crud.get_orders(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor_header(response, orders, limit)
+    return _orders_json.response([crud.order_row(o) for o in orders], response)
+
 
 @router.get(
     "/",
-    response_model=List[schemas.Order],
+    response_model=Union[List[schemas.Order], List[schemas.OrderSummary]],
     description="Получить заказы пользователя или все заказы (если активный пользователь администратор или менеджер)",
 )
 def read_orders(
+    response: Response,
     skip: int = Query(0, description="Смещение"),
     limit: int = Query(100, ge=1, description="Количество отображаемых товаров"),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (вместо skip)"
+    ),
+    view: schemas.OrderView = _view_query,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    if current_user.role in [UserRole.MANAGER, UserRole.ADMIN]:
-        return crud.get_orders(db, skip=skip, limit=limit)
-    return crud.get_orders(db, user_id=current_user.id, skip=skip, limit=limit)
+    user_id = None
+    if current_user.role not in [UserRole.MANAGER, UserRole.ADMIN]:
+        user_id = current_user.id
+    return _orders_response(db, response, view, user_id, skip, limit, cursor)
 
 
 @router.get(
     "/user/{user_id}",
-    response_model=List[schemas.Order],
+    response_model=Union[List[schemas.Order], List[schemas.OrderSummary]],
     description="Получить все заказы по ID пользователя (только для менеджера или администратора)",
     dependencies=[Depends(check_manager_role)],
 )
 def read_user_orders(
     user_id: int,
+    response: Response,
     skip: int = Query(0, description="Смещение"),
     limit: int = Query(100, ge=1, description="Количество отображаемых товаров"),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (вместо skip)"
+    ),
+    view: schemas.OrderView = _view_query,
     db: Session = Depends(get_db),
 ):
-    return crud.get_orders(db, user_id=user_id, skip=skip, limit=limit)
+    return _orders_response(db, response, view, user_id, skip, limit, cursor)
 
 
 @router.post("/", response_model=schemas.Order, description="Создать заказ")
 def create_order(
     order: schemas.OrderCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return crud.create_order(db, order=order, user_id=current_user.id)
+    try:
+        return crud.create_order(db, order=order, user_id=current_user.id)
+    except crud.UnknownProductsError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except crud.InsufficientStockError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.get(
@@ -58,7 +104,7 @@ def create_order(
 )
 def read_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     db_order = crud.get_order(db, order_id=order_id)
@@ -92,7 +138,10 @@ def update_order_status(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
         )
-    return crud.update_order_status(db, order_id=order_id, status=status_update)
+    try:
+        return crud.update_order_status(db, order_id=order_id, status=status_update)
+    except crud.InsufficientStockError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.delete(
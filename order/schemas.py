@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import List, Optional
 from decimal import Decimal
+from enum import Enum
 from models import OrderStatus
 
 
@@ -20,13 +21,29 @@ class OrderBase(BaseModel):
 
 
 class OrderCreate(OrderBase):
-    items: List[OrderItemBase]
+    items: List[OrderItemBase] = Field(..., min_length=1)
 
 
 class OrderUpdate(BaseModel):
     status: Optional[OrderStatus]
 
 
+class OrderView(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class OrderSummary(OrderBase):
+    id: int
+    status: OrderStatus = Field(default=OrderStatus.PENDING)
+    user_id: int
+    user_name: str
+    amount: Decimal
+    item_count: int
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+
 class Order(OrderBase):
     id: int
     status: OrderStatus = Field(default=OrderStatus.PENDING)
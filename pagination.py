@@ -0,0 +1,72 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Unsupported cursor value: {value!r}")
+
+
+def encode_cursor(sort_key: str, values: list) -> str:
+    payload = json.dumps({"k": sort_key, "v": values}, default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        valid = payload["k"] == sort_key and len(values) == size
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        valid = False
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return values
+
+
+def keyset_filter(columns: list, values: list, descending: bool = False):
+    left = tuple_(*columns)
+    right = tuple_(
+        *(literal(value, type_=column.type) for column, value in zip(columns, values))
+    )
+    return left < right if descending else left > right
+
+
+def apply_keyset(
+    query, columns: list, sort_key: str, cursor: Optional[str], descending: bool
+):
+    if cursor:
+        values = decode_cursor(cursor, sort_key, len(columns))
+        query = query.where(keyset_filter(columns, values, descending))
+    return query.order_by(
+        *(column.desc() if descending else column.asc() for column in columns)
+    )
+
+
+def next_cursor(sort_key: str, items: list, limit: int, keys: list) -> Optional[str]:
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, dict):
+        values = [last[key] for key in keys]
+    else:
+        values = [getattr(last, key) for key in keys]
+    return encode_cursor(sort_key, values)
+
+
+def set_next_cursor_header(response: Response, items: list, limit: int):
+    cursor = next_cursor("id:asc", items, limit, ["id"])
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -1,13 +1,317 @@
-from sqlalchemy.orm import Session
+import math
+import re
+from sqlalchemy import (
+    Float,
+    case,
+    cast,
+    column,
+    false,
+    func,
+    literal_column,
+    select,
+    table,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from typing import Optional
 from . import schemas
 import models
+from cache import TTLCache
+from config import settings
+from pagination import apply_keyset, encode_cursor
+import etag
+from category_registry import registry as category_registry
+from analytics import crud as analytics_crud
 
 
 def get_product(db: Session, product_id: int) -> Optional[models.Product]:
     return db.query(models.Product).filter(models.Product.id == product_id).first()
 
 
+async def get_product_async(
+    db: AsyncSession, product_id: int
+) -> Optional[models.Product]:
+    return await db.scalar(
+        select(models.Product)
+        .options(joinedload(models.Product.category))
+        .where(models.Product.id == product_id)
+    )
+
+
+SORT_COLUMNS = {
+    "id": models.Product.id,
+    "name": models.Product.name,
+    "price": models.Product.price,
+    "rating": models.Product.rating_avg,
+}
+
+_products_fts = table("products_fts", column("rowid"), column("products_fts"))
+
+# Ключи кэша количеств начинаются с версий таблиц товаров и категорий: запись
+# в любом воркере меняет версию, и старые записи перестают совпадать везде
+_count_cache = TTLCache(settings.count_cache_size, settings.count_cache_ttl)
+_COUNT_TABLES = (etag.PRODUCTS, etag.CATEGORIES)
+
+
+def invalidate_product_counts():
+    """Освободить кэш количеств текущего процесса (актуальность - по версиям)."""
+    _count_cache.clear()
+
+
+def _filter_signature(
+    version, name, category_id, min_price, max_price, in_stock
+) -> tuple:
+    return (
+        version,
+        name or None,
+        category_id or None,
+        float(min_price) if min_price else None,
+        float(max_price) if max_price else None,
+        bool(in_stock),
+    )
+
+
+def _search_expression(text: str) -> Optional[str]:
+    text = text.replace("ё", "е").replace("Ё", "Е")
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _search_subquery(text: str):
+    expression = _search_expression(text)
+    fts = _products_fts
+    query = select(
+        fts.c.rowid.label("product_id"),
+        (-func.bm25(literal_column("products_fts"), 10.0, 1.0)).label("rank"),
+    )
+    if expression is None:
+        return query.where(false()).subquery("search")
+    return query.where(fts.c.products_fts.match(expression)).subquery("search")
+
+
+def _apply_filters(
+    query,
+    name: Optional[str] = None,
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+):
+    search = None
+    if name:
+        search = _search_subquery(name)
+        query = query.join(search, search.c.product_id == models.Product.id)
+    if category_id:
+        query = query.where(models.Product.category_id == category_id)
+    if min_price:
+        query = query.where(models.Product.price >= min_price)
+    if max_price:
+        query = query.where(models.Product.price <= max_price)
+    if in_stock:
+        query = query.where(models.Product.stock > 0)
+    return query, search
+
+
+class UnknownCategoryError(Exception):
+    def __init__(self, name: str):
+        self.name = name
+        super().__init__(f"Category not found: {name}")
+
+
+def _category_id(name: Optional[str]) -> Optional[int]:
+    if not name:
+        return None
+    category_id = category_registry.id_of(name)
+    if category_id is None:
+        raise UnknownCategoryError(name)
+    return category_id
+
+
+def _price_bucket():
+    bounds = settings.facet_price_buckets
+    return case(
+        *((models.Product.price < bound, index) for index, bound in enumerate(bounds)),
+        else_=len(bounds),
+    )
+
+
+def _facet_query(**filters):
+    # Один проход по отфильтрованным товарам: количество по каждому сочетанию
+    # категории, ценового диапазона и наличия. Из этих строк складываются все
+    # фасеты, поэтому набор запрошенных фасетов не влияет на запрос и кэш
+    bucket = _price_bucket().label("price_bucket")
+    in_stock = (models.Product.stock > 0).label("in_stock")
+    query, _ = _apply_filters(
+        select(models.Product.category_id, bucket, in_stock, func.count()),
+        **filters,
+    )
+    return query.group_by(models.Product.category_id, bucket, in_stock)
+
+
+def _facets(rows: list, requested: set) -> dict:
+    by_category, by_bucket, by_stock = {}, {}, {True: 0, False: 0}
+    for category_id, bucket, in_stock, count in rows:
+        by_category[category_id] = by_category.get(category_id, 0) + count
+        by_bucket[bucket] = by_bucket.get(bucket, 0) + count
+        by_stock[bool(in_stock)] += count
+
+    facets = {"category": None, "price": None, "in_stock": None}
+    if schemas.Facet.CATEGORY in requested:
+        facets["category"] = [
+            {
+                "category_id": category_id,
+                "category_name": category_registry.name_of(category_id),
+                "count": count,
+            }
+            for category_id, count in sorted(
+                by_category.items(), key=lambda item: (-item[1], item[0])
+            )
+        ]
+    if schemas.Facet.PRICE in requested:
+        bounds = [None, *map(float, settings.facet_price_buckets), None]
+        facets["price"] = [
+            {
+                "min_price": bounds[index],
+                "max_price": bounds[index + 1],
+                "count": by_bucket.get(index, 0),
+            }
+            for index in range(len(bounds) - 1)
+        ]
+    if schemas.Facet.IN_STOCK in requested:
+        facets["in_stock"] = {
+            "in_stock": by_stock[True],
+            "out_of_stock": by_stock[False],
+        }
+    return facets
+
+
+def _product_row(product: models.Product, category_name: str, rating) -> dict:
+    # Порядок ключей совпадает с порядком полей схемы Product
+    return {
+        "name": product.name,
+        "price": product.price,
+        "category_id": product.category_id,
+        "description": product.description,
+        "stock": product.stock,
+        "id": product.id,
+        "category_name": category_name,
+        "created_at": product.created_at,
+        "updated_at": product.updated_at,
+        "rating": float(rating or 0),
+    }
+
+
+class _ProductListing:
+    def __init__(
+        self,
+        page: int = 1,
+        limit: int = 10,
+        name: Optional[str] = None,
+        category_id: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = "asc",
+        cursor: Optional[str] = None,
+        exact_total: bool = True,
+        facets: Optional[list] = None,
+        version: str = "",
+    ):
+        filters = dict(
+            name=name,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+        )
+        query, search = _apply_filters(
+            select(models.Product, models.Product.rating_avg.label("rating")),
+            **filters,
+        )
+
+        sort_columns = dict(SORT_COLUMNS)
+        if search is not None:
+            sort_columns["relevance"] = search.c.rank
+        if sort_by in sort_columns:
+            self.keys = [sort_columns[sort_by], models.Product.id]
+            descending = sort_order.lower() == "desc"
+            self.sort_key = f"{sort_by}:{'desc' if descending else 'asc'}"
+        else:
+            self.keys = [models.Product.id]
+            descending = False
+            self.sort_key = "id:asc"
+        query = query.add_columns(self.keys[0].label("sort_value"))
+        query = apply_keyset(query, self.keys, self.sort_key, cursor, descending)
+
+        self.page = max(page, 1)
+        self.limit = limit
+        if not cursor:
+            query = query.offset((self.page - 1) * limit)
+        self.query = query.limit(limit)
+
+        matching, _ = _apply_filters(select(models.Product.id), **filters)
+        self.exact_total = exact_total
+        if exact_total:
+            self.count_query = select(func.count()).select_from(matching.subquery())
+        else:
+            bounded = matching.limit(settings.count_estimate_limit).subquery()
+            self.count_query = select(func.count()).select_from(bounded)
+        self.signature = _filter_signature(version, **filters)
+
+        self.facets = set(facets or ())
+        self.facet_query = _facet_query(**filters) if self.facets else None
+
+    def cached_total(self) -> Optional[int]:
+        return _count_cache.get(self.signature)
+
+    def cached_facet_rows(self) -> Optional[list]:
+        # Строки фасетов лежат в кэше количеств под той же версией таблиц,
+        # поэтому устаревают вместе с ним при изменении товаров, категорий и наличия
+        return _count_cache.get(("facets", *self.signature))
+
+    def store_facet_rows(self, rows: list) -> list:
+        rows = [tuple(row) for row in rows]
+        _count_cache.set(("facets", *self.signature), rows)
+        return rows
+
+    def store_total(self, total: int) -> bool:
+        if not self.exact_total and total >= settings.count_estimate_limit:
+            return True
+        _count_cache.set(self.signature, total)
+        return False
+
+    def result(
+        self, rows: list, total: int, estimated: bool, facet_rows: list = None
+    ) -> dict:
+        next_page = None
+        if rows and len(rows) == self.limit:
+            last = rows[-1]
+            values = [last.sort_value]
+            if len(self.keys) == 2:
+                values.append(last[0].id)
+            next_page = encode_cursor(self.sort_key, values)
+
+        return {
+            "items": [
+                _product_row(
+                    product, category_registry.name_of(product.category_id), rating
+                )
+                for product, rating, _ in rows
+            ],
+            "total": total,
+            "total_estimated": estimated,
+            "page": self.page,
+            "limit": self.limit,
+            "pages": (total + self.limit - 1) // self.limit,
+            "next_cursor": next_page,
+            "facets": _facets(facet_rows, self.facets) if self.facets else None,
+        }
+
+
 def get_products(
     db: Session,
     page: int = 1,
@@ -19,54 +323,136 @@ def get_products(
     in_stock: Optional[bool] = None,
     sort_by: Optional[str] = None,
     sort_order: Optional[str] = "asc",
+    cursor: Optional[str] = None,
+    exact_total: bool = True,
+    facets: Optional[list] = None,
 ) -> dict:
-    query = db.query(models.Product)
+    category_registry.refresh(db)
+    listing = _ProductListing(
+        page,
+        limit,
+        name,
+        _category_id(category),
+        min_price,
+        max_price,
+        in_stock,
+        sort_by,
+        sort_order,
+        cursor,
+        exact_total,
+        facets,
+        etag.get_etag(db, *_COUNT_TABLES),
+    )
+    total, estimated = listing.cached_total(), False
+    if total is None:
+        total = db.scalar(listing.count_query)
+        estimated = listing.store_total(total)
+    facet_rows = listing.cached_facet_rows() if listing.facets else None
+    if listing.facets and facet_rows is None:
+        facet_rows = listing.store_facet_rows(db.execute(listing.facet_query).all())
+    rows = db.execute(listing.query).all()
+    return listing.result(rows, total, estimated, facet_rows)
 
-    if name:
-        query = query.filter(models.Product.name.ilike(f"%{name}%"))
 
-    if category:
-        query = query.join(models.Category).filter(models.Category.name == category)
-    if min_price:
-        query = query.filter(models.Product.price >= min_price)
-    if max_price:
-        query = query.filter(models.Product.price <= max_price)
-    if in_stock:
-        query = query.filter(models.Product.stock > 0)
-    if sort_by:
-        order_column = None
-        if sort_by == "name":
-            order_column = models.Product.name
-        elif sort_by == "price":
-            order_column = models.Product.price
-        elif sort_by == "rating":
-            order_column = models.Product.rating
-
-        if order_column:
-            if sort_order.lower() == "desc":
-                query = query.order_by(order_column.desc())
-            else:
-                query = query.order_by(order_column.asc())
-    total = query.count()
-    if page < 1:
-        page = 1
-    offset = (page - 1) * limit
-
-    items = query.offset(offset).limit(limit).all()
+async def get_products_async(
+    db: AsyncSession,
+    page: int = 1,
+    limit: int = 10,
+    name: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "asc",
+    cursor: Optional[str] = None,
+    exact_total: bool = True,
+    facets: Optional[list] = None,
+) -> dict:
+    await category_registry.refresh_async(db)
+    listing = _ProductListing(
+        page,
+        limit,
+        name,
+        _category_id(category),
+        min_price,
+        max_price,
+        in_stock,
+        sort_by,
+        sort_order,
+        cursor,
+        exact_total,
+        facets,
+        await etag.get_etag_async(db, *_COUNT_TABLES),
+    )
+    total, estimated = listing.cached_total(), False
+    if total is None:
+        total = await db.scalar(listing.count_query)
+        estimated = listing.store_total(total)
+    facet_rows = listing.cached_facet_rows() if listing.facets else None
+    if listing.facets and facet_rows is None:
+        facet_rows = listing.store_facet_rows(
+            (await db.execute(listing.facet_query)).all()
+        )
+    rows = (await db.execute(listing.query)).all()
+    return listing.result(rows, total, estimated, facet_rows)
 
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "limit": limit,
-        "pages": (total + limit - 1) // limit,
-    }
+
+def get_category_counts(db: Session, category_id: int) -> tuple[int, int]:
+    """Количество товаров категории: всего и в наличии.
+
+    Оба числа считаются одним агрегатным запросом по индексу категории и
+    хранятся в общем кэше количеств под теми же ключами, что и итоги
+    списка товаров с фильтрами category / in_stock.
+    """
+    version = etag.get_etag(db, *_COUNT_TABLES)
+    total_key = _filter_signature(version, None, category_id, None, None, None)
+    in_stock_key = _filter_signature(version, None, category_id, None, None, True)
+    total, in_stock = _count_cache.get(total_key), _count_cache.get(in_stock_key)
+    if total is None or in_stock is None:
+        total, in_stock = db.execute(
+            select(
+                func.count(models.Product.id),
+                func.count(models.Product.id).filter(models.Product.stock > 0),
+            ).where(models.Product.category_id == category_id)
+        ).one()
+        _count_cache.set(total_key, total)
+        _count_cache.set(in_stock_key, in_stock)
+    return total, in_stock
+
+
+def get_category_products(
+    db: Session,
+    category_id: int,
+    total: int,
+    limit: int = 10,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "asc",
+    cursor: Optional[str] = None,
+) -> dict:
+    """Страница товаров категории в формате ProductPage.
+
+    Рейтинг берётся из агрегатов товара, название категории - из реестра,
+    поэтому стоимость запроса зависит от limit, а не от размера категории.
+    """
+    category_registry.refresh(db)
+    listing = _ProductListing(
+        limit=limit,
+        category_id=category_id,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+    )
+    rows = db.execute(listing.query).all()
+    return listing.result(rows, total, False)
 
 
 def create_product(db: Session, product: schemas.ProductCreate) -> models.Product:
     db_product = models.Product(**product.model_dump())
     db.add(db_product)
+    etag.bump_version(db, etag.PRODUCTS)
     db.commit()
+    invalidate_product_counts()
     db.refresh(db_product)
     return db_product
 
@@ -81,7 +467,9 @@ def update_product(
         update_data = product_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_product, key, value)
+        etag.bump_version(db, etag.PRODUCTS)
         db.commit()
+        invalidate_product_counts()
         db.refresh(db_product)
     return db_product
 
@@ -91,6 +479,88 @@ def delete_product(db: Session, product_id: int) -> Optional[models.Product]:
         db.query(models.Product).filter(models.Product.id == product_id).first()
     )
     if db_product:
+        analytics_crud.remove_products(db, [product_id])
         db.delete(db_product)
+        etag.bump_version(db, etag.PRODUCTS)
         db.commit()
+        invalidate_product_counts()
     return db_product
+
+
+def _rating_summary(db_product: Optional[models.Product]) -> Optional[dict]:
+    if db_product is None:
+        return None
+    return {
+        "product_id": db_product.id,
+        "rating": db_product.rating_avg,
+        "count": db_product.rating_count,
+        "histogram": db_product.rating_histogram,
+    }
+
+
+def get_rating_summary(db: Session, product_id: int) -> Optional[dict]:
+    return _rating_summary(get_product(db, product_id))
+
+
+async def get_rating_summary_async(db: AsyncSession, product_id: int) -> Optional[dict]:
+    return _rating_summary(await db.get(models.Product, product_id))
+
+
+def adjust_rating(db: Session, product_id: int, histogram_delta: dict[int, int]):
+    histogram_delta = {star: d for star, d in histogram_delta.items() if d}
+    if not histogram_delta:
+        return
+    product = models.Product
+    count = product.rating_count + sum(histogram_delta.values())
+    total = product.rating_sum + sum(star * d for star, d in histogram_delta.items())
+    values = {
+        f"rating_{star}": getattr(product, f"rating_{star}") + d
+        for star, d in histogram_delta.items()
+    }
+    db.execute(
+        update(product)
+        .where(product.id == product_id)
+        .values(
+            rating_sum=total,
+            rating_count=count,
+            rating_avg=case((count > 0, cast(total, Float) / count), else_=0.0),
+            **values,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    etag.bump_version(db, etag.PRODUCTS)
+
+
+def recompute_ratings(db: Session, fix: bool = True) -> list[int]:
+    histograms: dict[int, dict[int, int]] = {}
+    rows = db.execute(
+        select(models.Review.product_id, models.Review.rating, func.count())
+        .where(models.Review.status == models.ReviewStatus.APPROVED)
+        .group_by(models.Review.product_id, models.Review.rating)
+    )
+    for product_id, star, count in rows:
+        histograms.setdefault(product_id, {})[star] = count
+
+    drifted = []
+    for db_product in db.scalars(select(models.Product)):
+        histogram = histograms.get(db_product.id, {})
+        expected = {f"rating_{star}": histogram.get(star, 0) for star in range(1, 6)}
+        expected["rating_count"] = sum(histogram.values())
+        expected["rating_sum"] = sum(star * c for star, c in histogram.items())
+        expected["rating_avg"] = (
+            expected["rating_sum"] / expected["rating_count"]
+            if expected["rating_count"]
+            else 0.0
+        )
+        if any(
+            not math.isclose(getattr(db_product, key) or 0, value)
+            for key, value in expected.items()
+        ):
+            drifted.append(db_product.id)
+            if fix:
+                for key, value in expected.items():
+                    setattr(db_product, key, value)
+    if fix and drifted:
+        etag.bump_version(db, etag.PRODUCTS)
+        db.commit()
+    return drifted
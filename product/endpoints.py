@@ -1,37 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import io
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
-from enum import Enum
-from database import get_db, SessionLocal
+from typing import List, Optional
+from database import get_db, get_read_async_db
 from security import check_manager_role
-from . import crud, schemas
-from models import Category
+import etag
+from serialization import JSONSerializer
+from . import crud, importer, schemas
 
 router = APIRouter(prefix="/products", tags=["Товары"])
 
-
-def get_category_enum():
-    db = SessionLocal()
-    try:
-        categories = db.query(Category.name).all()
-        category_dict = {cat[0].replace(" ", "_"): cat[0] for cat in categories}
-        return Enum("CategoryEnum", category_dict)
-    finally:
-        db.close()
-
-
-CategoryEnum = get_category_enum()
+_page_json = JSONSerializer(schemas.ProductPage)
 
 
 @router.get(
     "/", response_model=schemas.ProductPage, description="Получить список товаров"
 )
 async def read_products(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Номер страницы"),
     limit: int = Query(10, ge=1, le=100, description="Количество товаров на странице"),
-    name: Optional[str] = Query(None, description="Фильтр по названию"),
-    category: Optional[CategoryEnum] = Query(None, description="Фильтр по категории"),
+    name: Optional[str] = Query(
+        None, description="Полнотекстовый поиск по названию и описанию"
+    ),
+    category: Optional[str] = Query(None, description="Фильтр по категории (название)"),
     min_price: Optional[float] = Query(None, ge=1, description="Минимальная цена"),
     max_price: Optional[float] = Query(None, ge=1, description="Максимальная цена"),
     in_stock: Optional[bool] = Query(None, description="Фильтр по наличию в наличии"),
@@ -41,25 +39,53 @@ async def read_products(
     sort_order: Optional[schemas.SortOrder] = Query(
         schemas.SortOrder.ASC, description="Порядок сортировки"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (вместо page)"
+    ),
+    exact_total: bool = Query(
+        True,
+        description="Точное количество товаров (false - приблизительное при большом объёме)",
+    ),
+    facets: Optional[List[schemas.Facet]] = Query(
+        None,
+        description="Посчитать фасеты по текущему фильтру: category, price, in_stock",
+    ),
+    db: AsyncSession = Depends(get_read_async_db),
 ):
     if min_price is not None and max_price is not None and min_price > max_price:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="The minimum price cannot be higher than the maximum",
         )
-    return crud.get_products(
-        db,
-        page=page,
-        limit=limit,
-        name=name,
-        category=category.value if category else None,
-        min_price=min_price,
-        max_price=max_price,
-        in_stock=in_stock,
-        sort_by=sort_by.value if sort_by else None,
-        sort_order=sort_order.value if sort_order else "asc",
+    not_modified = etag.conditional_response(
+        request,
+        response,
+        "products",
+        await etag.get_etag_async(db, etag.PRODUCTS, etag.CATEGORIES),
     )
+    if not_modified:
+        return not_modified
+    try:
+        result = await crud.get_products_async(
+            db,
+            page=page,
+            limit=limit,
+            name=name,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            sort_by=sort_by.value if sort_by else None,
+            sort_order=sort_order.value if sort_order else "asc",
+            cursor=cursor,
+            exact_total=exact_total,
+            facets=facets,
+        )
+    except crud.UnknownCategoryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    return _page_json.response(result, response)
 
 
 @router.post(
@@ -72,13 +98,51 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     return crud.create_product(db, product=product)
 
 
+@router.post(
+    "/import",
+    response_model=schemas.ImportReport,
+    dependencies=[Depends(check_manager_role)],
+    description="Массовый импорт товаров из CSV или NDJSON (только для менеджера и администратора)",
+)
+async def import_products(
+    request: Request,
+    format: schemas.ImportFormat = Query(
+        schemas.ImportFormat.CSV, description="Формат тела запроса"
+    ),
+    db: Session = Depends(get_db),
+):
+    # Тело буферизуется во временный файл (в памяти только первые мегабайты),
+    # поэтому размер фида не ограничен памятью процесса
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b") as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        stream = io.TextIOWrapper(
+            body, encoding="utf-8-sig", errors="replace", newline=""
+        )
+        return await run_in_threadpool(importer.import_products, db, stream, format)
+
+
 @router.get(
     "/{product_id}",
     response_model=schemas.Product,
     description="Получить информацию о товаре",
 )
-def read_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = crud.get_product(db, product_id=product_id)
+async def read_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_async_db),
+):
+    not_modified = etag.conditional_response(
+        request,
+        response,
+        "product",
+        await etag.get_etag_async(db, etag.PRODUCTS, etag.CATEGORIES),
+    )
+    if not_modified:
+        return not_modified
+    db_product = await crud.get_product_async(db, product_id=product_id)
     if db_product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
@@ -86,6 +150,22 @@ def read_product(product_id: int, db: Session = Depends(get_db)):
     return db_product
 
 
+@router.get(
+    "/{product_id}/rating",
+    response_model=schemas.RatingSummary,
+    description="Получить сводку рейтинга товара",
+)
+async def read_product_rating(
+    product_id: int, db: AsyncSession = Depends(get_read_async_db)
+):
+    summary = await crud.get_rating_summary_async(db, product_id=product_id)
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
+        )
+    return summary
+
+
 @router.put(
     "/{product_id}",
     response_model=schemas.Product,
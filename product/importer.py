@@ -0,0 +1,156 @@
+import csv
+import json
+from typing import IO, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import schemas
+from .crud import invalidate_product_counts
+import models
+from config import settings
+import etag
+
+_products = models.Product.__table__
+
+# Ключ сопоставления строк фида с товарами каталога - название товара
+_insert_products = insert(_products)
+_update_products = update(_products).where(
+    _products.c.name == bindparam("product_name")
+)
+
+_FIELDS = tuple(schemas.ProductCreate.model_fields)
+
+
+def _csv_records(stream: IO[str]) -> Iterator[tuple[int, object]]:
+    reader = csv.DictReader(stream)
+    try:
+        for record in reader:
+            # Пустые ячейки CSV означают отсутствие значения
+            yield reader.line_num, {
+                key: (value if value != "" else None)
+                for key, value in record.items()
+                if key is not None
+            }
+    except csv.Error as e:
+        # После синтаксической ошибки продолжать чтение CSV нельзя
+        yield reader.line_num, e
+
+
+def _ndjson_records(stream: IO[str]) -> Iterator[tuple[int, object]]:
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as e:
+            yield line_num, e
+
+
+_READERS = {
+    schemas.ImportFormat.CSV: _csv_records,
+    schemas.ImportFormat.NDJSON: _ndjson_records,
+}
+
+
+class _ProductImport:
+    def __init__(self, db: Session, chunk_size: int, max_errors: int):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.category_ids = set(db.scalars(select(models.Category.id)))
+        self.chunk: dict[str, dict] = {}
+        self.report = {
+            "processed": 0,
+            "created": 0,
+            "updated": 0,
+            "failed": 0,
+            "errors": [],
+            "errors_truncated": False,
+        }
+
+    def error(self, line: int, message: str):
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < self.max_errors:
+            self.report["errors"].append({"line": line, "message": message})
+        else:
+            self.report["errors_truncated"] = True
+
+    def add(self, line: int, record):
+        self.report["processed"] += 1
+        if isinstance(record, Exception):
+            self.error(line, f"Malformed row: {record}")
+            return
+        try:
+            product = schemas.ProductCreate.model_validate(record)
+        except ValidationError as e:
+            self.error(
+                line,
+                "; ".join(
+                    f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}"
+                    for err in e.errors()
+                ),
+            )
+            return
+        if product.category_id not in self.category_ids:
+            self.error(line, f"Category not found: {product.category_id}")
+            return
+        # Повтор названия внутри пакета: побеждает последняя строка
+        self.chunk[product.name] = product.model_dump(include=set(_FIELDS))
+        if len(self.chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.chunk:
+            return
+        existing = set(
+            self.db.scalars(
+                select(models.Product.name)
+                .where(models.Product.name.in_(self.chunk))
+                .distinct()
+            )
+        )
+        inserts = [row for name, row in self.chunk.items() if name not in existing]
+        updates = [
+            {"product_name": name, **{k: v for k, v in row.items() if k != "name"}}
+            for name, row in self.chunk.items()
+            if name in existing
+        ]
+        if inserts:
+            self.db.execute(_insert_products, inserts)
+        if updates:
+            self.db.execute(_update_products, updates)
+        etag.bump_version(self.db, etag.PRODUCTS)
+        self.db.commit()
+        self.report["created"] += len(inserts)
+        self.report["updated"] += len(updates)
+        self.chunk.clear()
+
+
+def import_products(
+    db: Session,
+    stream: IO[str],
+    format: schemas.ImportFormat,
+    chunk_size: int = None,
+    max_errors: int = None,
+) -> dict:
+    """Импорт товаров из текстового потока CSV или NDJSON.
+
+    Строки проверяются схемой ProductCreate и записываются пакетами
+    (executemany) по chunk_size: новые названия добавляются, существующие
+    обновляются. В памяти держится только текущий пакет, каждый пакет
+    фиксируется отдельной транзакцией.
+    """
+    job = _ProductImport(
+        db,
+        chunk_size or settings.import_chunk_size,
+        settings.import_max_errors if max_errors is None else max_errors,
+    )
+    try:
+        for line, record in _READERS[format](stream):
+            job.add(line, record)
+        job.flush()
+    finally:
+        invalidate_product_counts()
+    return job.report
@@ -9,6 +9,7 @@ class SortBy(str, Enum):
     NAME = "name"
     PRICE = "price"
     RATING = "rating"
+    RELEVANCE = "relevance"
 
 
 class SortOrder(str, Enum):
@@ -16,12 +17,49 @@ class SortOrder(str, Enum):
     DESC = "desc"
 
 
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class Facet(str, Enum):
+    CATEGORY = "category"
+    PRICE = "price"
+    IN_STOCK = "in_stock"
+
+
+class CategoryFacet(BaseModel):
+    category_id: int
+    category_name: str
+    count: int
+
+
+class PriceFacet(BaseModel):
+    min_price: Optional[float]
+    max_price: Optional[float]
+    count: int
+
+
+class StockFacet(BaseModel):
+    in_stock: int
+    out_of_stock: int
+
+
+class ProductFacets(BaseModel):
+    category: Optional[List[CategoryFacet]] = None
+    price: Optional[List[PriceFacet]] = None
+    in_stock: Optional[StockFacet] = None
+
+
 class ProductPage(BaseModel):
     items: List["Product"]
     total: int
+    total_estimated: bool = False
     page: int
     limit: int
     pages: int
+    next_cursor: Optional[str] = None
+    facets: Optional[ProductFacets] = None
 
     class Config:
         from_attributes = True
@@ -112,7 +150,28 @@ class Product(ProductBase):
     category_name: str
     created_at: datetime
     updated_at: Optional[datetime]
-    rating: int
+    rating: float
 
     class Config:
         from_attributes = True
+
+
+class RatingSummary(BaseModel):
+    product_id: int
+    rating: float
+    count: int
+    histogram: dict[int, int]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    message: str
+
+
+class ImportReport(BaseModel):
+    processed: int
+    created: int
+    updated: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
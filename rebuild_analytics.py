@@ -0,0 +1,27 @@
+import argparse
+import sys
+
+from database import SessionLocal
+from analytics.crud import rebuild_sales
+
+
+def main():
+    argparse.ArgumentParser(
+        description="Пересчёт витрин продаж (по дням, товарам и категориям) "
+        "по истории заказов"
+    ).parse_args()
+
+    db = SessionLocal()
+    try:
+        counts = rebuild_sales(db)
+        db.commit()
+    finally:
+        db.close()
+
+    for table, rows in counts.items():
+        print(f"{table}: {rows} строк")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import argparse
+import sys
+
+from database import SessionLocal
+from product.crud import recompute_ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Пересчёт агрегатов рейтинга товаров по таблице отзывов"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Только проверить расхождения, ничего не изменяя",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drifted = recompute_ratings(db, fix=not args.check)
+    finally:
+        db.close()
+
+    if not drifted:
+        print("Агрегаты рейтинга совпадают с отзывами.")
+        return 0
+    ids = ", ".join(str(product_id) for product_id in drifted)
+    if args.check:
+        print(f"Обнаружены расхождения у товаров: {ids}")
+        return 1
+    print(f"Агрегаты пересчитаны для товаров: {ids}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,138 @@
-from sqlalchemy.orm import Session
+from collections import Counter, defaultdict
+
+from sqlalchemy import String, func, select, tuple_, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from . import schemas
 import models
+from pagination import apply_keyset, encode_cursor
+from product import crud as prod_crud
+
+
+def _is_approved(status) -> bool:
+    return status == models.ReviewStatus.APPROVED
+
+
+def _review_query():
+    return select(models.Review).options(
+        joinedload(models.Review.user), joinedload(models.Review.product)
+    )
+
+
+def review_row(review: models.Review) -> dict:
+    # Порядок ключей совпадает с порядком полей схемы Review
+    return {
+        "rating": review.rating,
+        "text": review.text,
+        "id": review.id,
+        "product_id": review.product_id,
+        "product_name": review.product_name,
+        "user_id": review.user_id,
+        "user_name": review.user_name,
+        "status": review.status,
+        "created_at": review.created_at,
+        "updated_at": review.updated_at,
+    }
 
 
 def get_review(db: Session, review_id: int):
     return db.query(models.Review).filter(models.Review.id == review_id).first()
 
 
-def get_reviews(
-    db: Session,
+async def get_review_async(db: AsyncSession, review_id: int):
+    return await db.scalar(_review_query().where(models.Review.id == review_id))
+
+
+def _reviews_query(
     product_id: Optional[int] = None,
     user_id: Optional[int] = None,
     status: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    query = db.query(models.Review)
+    query = _review_query()
     if product_id:
-        query = query.filter(models.Review.product_id == product_id)
+        query = query.where(models.Review.product_id == product_id)
     if user_id:
-        query = query.filter(models.Review.user_id == user_id)
+        query = query.where(models.Review.user_id == user_id)
     if status:
-        query = query.filter(models.Review.status == status)
-    return query.offset(skip).limit(limit).all()
+        query = query.where(models.Review.status == status)
+    query = apply_keyset(query, [models.Review.id], "id:asc", cursor, False)
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def get_reviews(
+    db: Session,
+    product_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    query = _reviews_query(product_id, user_id, status, skip, limit, cursor)
+    return db.scalars(query).all()
+
+
+async def get_reviews_async(
+    db: AsyncSession,
+    product_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    query = _reviews_query(product_id, user_id, status, skip, limit, cursor)
+    return (await db.scalars(query)).all()
+
+
+# Очередь модерации читается по индексу (status, created_at). Ключ курсора -
+# created_at в том виде, в каком он хранится в базе, и id для равных значений
+_QUEUE_KEYS = [type_coerce(models.Review.created_at, String), models.Review.id]
+_QUEUE_SORT_KEY = "created_at:asc"
+
+
+def _moderation_query(status, limit: int, cursor: Optional[str]):
+    query = (
+        _review_query()
+        .add_columns(_QUEUE_KEYS[0].label("sort_value"))
+        .where(models.Review.status == status)
+    )
+    query = apply_keyset(query, _QUEUE_KEYS, _QUEUE_SORT_KEY, cursor, False)
+    return query.limit(limit)
+
+
+def _moderation_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    next_page = None
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        next_page = encode_cursor(_QUEUE_SORT_KEY, [last.sort_value, last[0].id])
+    return [review for review, _ in rows], next_page
+
+
+def get_moderation_queue(
+    db: Session,
+    status=models.ReviewStatus.PENDING,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> tuple[list, Optional[str]]:
+    rows = db.execute(_moderation_query(status, limit, cursor)).all()
+    return _moderation_page(rows, limit)
+
+
+async def get_moderation_queue_async(
+    db: AsyncSession,
+    status=models.ReviewStatus.PENDING,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> tuple[list, Optional[str]]:
+    rows = (await db.execute(_moderation_query(status, limit, cursor))).all()
+    return _moderation_page(rows, limit)
 
 
 def create_review(
@@ -33,6 +142,9 @@ def create_review(
         **review.model_dump(), product_id=product_id, user_id=user_id
     )
     db.add(db_review)
+    db.flush()
+    if _is_approved(db_review.status):
+        prod_crud.adjust_rating(db, product_id, {db_review.rating: 1})
     db.commit()
     db.refresh(db_review)
     return db_review
@@ -41,6 +153,8 @@ def create_review(
 def update_review(db: Session, review_id: int, review_update: schemas.ReviewUpdate):
     db_review = db.query(models.Review).filter(models.Review.id == review_id).first()
     if db_review:
+        if _is_approved(db_review.status):
+            prod_crud.adjust_rating(db, db_review.product_id, {db_review.rating: -1})
         update_data = review_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_review, key, value)
@@ -53,6 +167,11 @@ def update_review(db: Session, review_id: int, review_update: schemas.ReviewUpda
 def update_review_status(db: Session, review_id: int, status: str):
     db_review = db.query(models.Review).filter(models.Review.id == review_id).first()
     if db_review:
+        was_approved = _is_approved(db_review.status)
+        if was_approved != _is_approved(status):
+            prod_crud.adjust_rating(
+                db, db_review.product_id, {db_review.rating: -1 if was_approved else 1}
+            )
         db_review.status = status
         db.commit()
         db.refresh(db_review)
@@ -62,6 +181,63 @@ def update_review_status(db: Session, review_id: int, status: str):
 def delete_review(db: Session, review_id: int):
     db_review = db.query(models.Review).filter(models.Review.id == review_id).first()
     if db_review:
+        if _is_approved(db_review.status):
+            prod_crud.adjust_rating(db, db_review.product_id, {db_review.rating: -1})
         db.delete(db_review)
         db.commit()
     return db_review
+
+
+class ConcurrentModerationError(Exception):
+    def __init__(self):
+        super().__init__("Reviews were modified concurrently, retry the request")
+
+
+def update_review_statuses(db: Session, review_ids: List[int], status) -> dict:
+    """Сменить статус набора отзывов одной транзакцией.
+
+    Статусы меняются одним UPDATE, а рейтинг каждого затронутого товара
+    пересчитывается один раз по суммарной гистограмме изменений.
+    """
+    review_ids = list(dict.fromkeys(review_ids))
+    rows = db.execute(
+        select(
+            models.Review.id,
+            models.Review.product_id,
+            models.Review.rating,
+            models.Review.status,
+        ).where(models.Review.id.in_(review_ids))
+    ).all()
+    changed = [row for row in rows if row.status != status]
+    deltas = defaultdict(Counter)
+    for row in changed:
+        was_approved = _is_approved(row.status)
+        if was_approved != _is_approved(status):
+            deltas[row.product_id][row.rating] += -1 if was_approved else 1
+
+    if changed:
+        # Условие на прежний статус: если отзыв успели изменить после чтения,
+        # число обновлённых строк не совпадёт и гистограммы не будут испорчены
+        result = db.execute(
+            update(models.Review)
+            .where(
+                tuple_(models.Review.id, models.Review.status).in_(
+                    [(row.id, row.status) for row in changed]
+                )
+            )
+            .values(status=status, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(changed):
+            db.rollback()
+            raise ConcurrentModerationError()
+        for product_id, histogram_delta in deltas.items():
+            prod_crud.adjust_rating(db, product_id, histogram_delta)
+        db.commit()
+
+    found = {row.id for row in rows}
+    return {
+        "updated": len(changed),
+        "unchanged": len(rows) - len(changed),
+        "not_found": [review_id for review_id in review_ids if review_id not in found],
+    }
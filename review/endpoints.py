@@ -1,26 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from database import get_db
-from security import get_current_user, check_manager_role, get_optional_current_user
+from database import get_db, get_read_async_db
+from pagination import NEXT_CURSOR_HEADER, set_next_cursor_header
+from serialization import JSONSerializer
+from security import (
+    Principal,
+    get_current_user,
+    check_manager_role,
+    get_optional_current_user,
+)
 from . import crud, schemas
-from models import User, UserRole, ReviewStatus
+from models import UserRole, ReviewStatus
 
 router = APIRouter(prefix="/reviews", tags=["Отзывы"])
 
+_reviews_json = JSONSerializer(List[schemas.Review])
+
 
 @router.get(
     "/", response_model=List[schemas.Review], description="Получить список отзывов"
 )
 async def read_reviews(
+    response: Response,
     product_id: Optional[int] = Query(None, gt=0, description="ID Товара"),
     user_id: Optional[int] = Query(None, gt=0, description="ID Пользователя"),
     skip: int = Query(0, description="Сколько отзывов пропустить"),
     limit: int = Query(100, gt=0, description="Сколько отзывов получить"),
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (вместо skip)"
+    ),
+    db: AsyncSession = Depends(get_read_async_db),
+    current_user: Optional[Principal] = Depends(get_optional_current_user),
 ):
     if current_user and current_user.role in [
         UserRole.ADMIN,
@@ -29,14 +43,17 @@ async def read_reviews(
         status = None
     else:
         status = ReviewStatus.APPROVED
-    return crud.get_reviews(
+    reviews = await crud.get_reviews_async(
         db,
         product_id=product_id,
         user_id=user_id,
         status=status,
         skip=skip,
         limit=limit,
+        cursor=cursor,
     )
+    set_next_cursor_header(response, reviews, limit)
+    return _reviews_json.response([crud.review_row(r) for r in reviews], response)
 
 
 @router.post(
@@ -47,7 +64,7 @@ async def read_reviews(
 def create_review(
     product_id: int,
     review: schemas.ReviewCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     return crud.create_review(
@@ -55,9 +72,50 @@ def create_review(
     )
 
 
+@router.get(
+    "/moderation",
+    response_model=List[schemas.Review],
+    dependencies=[Depends(check_manager_role)],
+    description="Очередь модерации: отзывы со статусом в порядке поступления "
+    "(только для администратора и менеджера)",
+)
+async def read_moderation_queue(
+    response: Response,
+    review_status: ReviewStatus = Query(
+        ReviewStatus.PENDING, alias="status", description="Статус отзывов"
+    ),
+    limit: int = Query(50, gt=0, le=500, description="Сколько отзывов получить"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    db: AsyncSession = Depends(get_read_async_db),
+):
+    reviews, next_page = await crud.get_moderation_queue_async(
+        db, status=review_status, limit=limit, cursor=cursor
+    )
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return _reviews_json.response([crud.review_row(r) for r in reviews], response)
+
+
+@router.patch(
+    "/status",
+    response_model=schemas.ReviewStatusBulkResult,
+    dependencies=[Depends(check_manager_role)],
+    description="Изменить статус нескольких отзывов (только для администратора и менеджера)",
+)
+def update_review_statuses(
+    status_update: schemas.ReviewStatusBulkUpdate, db: Session = Depends(get_db)
+):
+    try:
+        return crud.update_review_statuses(
+            db, review_ids=status_update.review_ids, status=status_update.status
+        )
+    except crud.ConcurrentModerationError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
 @router.get("/{review_id}", response_model=schemas.Review)
-def read_review(review_id: int, db: Session = Depends(get_db)):
-    db_review = crud.get_review(db, review_id=review_id)
+async def read_review(review_id: int, db: AsyncSession = Depends(get_read_async_db)):
+    db_review = await crud.get_review_async(db, review_id=review_id)
     if db_review is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
@@ -73,7 +131,7 @@ def read_review(review_id: int, db: Session = Depends(get_db)):
 def update_review(
     review_id: int,
     review: schemas.ReviewUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     db_review = crud.get_review(db, review_id=review_id)
@@ -108,7 +166,7 @@ def update_review_status(
 @router.delete("/{review_id}", description="Удалить отзыв")
 def delete_review(
     review_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     db_review = crud.get_review(db, review_id=review_id)
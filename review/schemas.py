@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from models import ReviewStatus
 
 
@@ -30,3 +30,14 @@ class Review(ReviewBase):
 
     class Config:
         from_attributes = True
+
+
+class ReviewStatusBulkUpdate(BaseModel):
+    review_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    status: ReviewStatus
+
+
+class ReviewStatusBulkResult(BaseModel):
+    updated: int
+    unchanged: int
+    not_found: List[int]
@@ -1,8 +1,12 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 from config import settings
 import jwt
@@ -12,20 +16,95 @@ TOKEN_EXPIRE_MINUTES = settings.token_expire_minutes
 
 from config import settings
 from models import User, UserRole
-from database import get_db
+from database import AsyncSessionLocal
+from cache import TTLCache
+import metrics
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login", auto_error=False)
 
 
-def verify_password(plain_password: str, hashed_password: str):
+def _timed(submitted_at: float, func, *args):
+    started_at = time.time()
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started_at - submitted_at, time.perf_counter() - started
+
+
+def _verify(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password + settings.salt, hashed_password)
 
 
-def get_password_hash(password: str):
+def _hash(password: str):
     return pwd_context.hash(password + settings.salt)
 
 
+_hash_executor = None
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+
+def _get_hash_executor():
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.password_hash_executor == "process":
+            _hash_executor = ProcessPoolExecutor(settings.password_hash_workers)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                settings.password_hash_workers, thread_name_prefix="password-hash"
+            )
+    return _hash_executor
+
+
+def _release_hash_slot(future: Future):
+    global _hash_pending
+    with _hash_lock:
+        _hash_pending -= 1
+
+
+def _submit_hash_task(operation: str, func, *args) -> Future:
+    global _hash_pending
+    limit = settings.password_hash_workers + settings.password_hash_queue_size
+    with _hash_lock:
+        if _hash_pending >= limit:
+            metrics.password_hash_rejected.labels(operation).inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks in progress",
+                headers={"Retry-After": "1"},
+            )
+        _hash_pending += 1
+    try:
+        future = _get_hash_executor().submit(_timed, time.time(), func, *args)
+    except Exception:
+        _release_hash_slot(None)
+        raise
+    future.add_done_callback(_release_hash_slot)
+    return future
+
+
+def _hash_result(operation: str, timed_result: tuple):
+    result, queue_wait, duration = timed_result
+    metrics.password_hash_queue_wait.labels(operation).observe(queue_wait)
+    metrics.password_hash_duration.labels(operation).observe(duration)
+    return result
+
+
+def verify_password(plain_password: str, hashed_password: str):
+    future = _submit_hash_task("verify", _verify, plain_password, hashed_password)
+    return _hash_result("verify", future.result())
+
+
+def get_password_hash(password: str):
+    future = _submit_hash_task("hash", _hash, password)
+    return _hash_result("hash", future.result())
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    future = _submit_hash_task("verify", _verify, plain_password, hashed_password)
+    return _hash_result("verify", await asyncio.wrap_future(future))
+
+
 def create_access_token(user_id: int):
     now = datetime.now()
     payload = {
@@ -56,9 +135,30 @@ def decode_token(token: str):
         )
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: UserRole
+    username: str
+
+
+# Кэш свой у каждого процесса. Сверять его с версией таблицы users пришлось бы
+# запросом на каждый вызов - столько же стоит и сама загрузка пользователя,
+# поэтому другие воркеры видят смену роли или удаление пользователя с
+# задержкой до principal_cache_ttl
+_principal_cache = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl)
+
+
+def invalidate_principal(user_id: int):
+    """Сбросить кэш пользователя в текущем процессе."""
+    _principal_cache.pop_where(lambda principal: principal.id == user_id)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    principal = _principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="User not found",
@@ -76,24 +176,29 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal(id=user.id, role=user.role, username=user.username)
+    # Запись не переживает сам токен
+    ttl = min(settings.principal_cache_ttl, payload["exp"] - time.time())
+    _principal_cache.set(token, principal, ttl=ttl)
+    return principal
 
 
 async def get_optional_current_user(
-    token: Optional[str] = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> Optional[User]:
+    token: Optional[str] = Depends(oauth2_scheme),
+) -> Optional[Principal]:
     if not token:
         return None
     try:
-        return await get_current_user(token, db)
+        return await get_current_user(token)
     except Exception:
         return None
 
 
-async def check_admin_role(current_user: User = Depends(get_current_user)):
+async def check_admin_role(current_user: Principal = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -102,7 +207,9 @@ async def check_admin_role(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-async def check_manager_role(current_user: User = Depends(get_current_user)):
+async def check_manager_role(
+    current_user: Principal = Depends(get_current_user),
+):
     if current_user.role not in [UserRole.MANAGER, UserRole.ADMIN]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
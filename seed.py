@@ -1,7 +1,9 @@
 import datetime
 from sqlalchemy.orm import Session
-from database import engine, Base
+from database import engine
+import migrations
 from security import get_password_hash
+from analytics import crud as analytics_crud
 from models import (
     User,
     Category,
@@ -18,8 +20,12 @@ from models import (
 def seed_data():
     print("Очистка базы данных...")
 
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    migrations.reset(engine)
+    migrations.upgrade(engine)
+
+    # Модули пакетов импортируются после создания таблиц: при импорте они
+    # могут обращаться к базе
+    from product.crud import recompute_ratings
 
     db = Session(bind=engine)
 
@@ -299,6 +305,7 @@ def seed_data():
                 product_id=1,  # iPhone 15 Pro
                 quantity=1,
                 price_at_order=products[0].price,
+                category_id=products[0].category_id,
             ),
             # Заказ 2 - 2 товара
             OrderItem(
@@ -306,12 +313,14 @@ def seed_data():
                 product_id=3,  # Xiaomi Redmi Note 12 Pro
                 quantity=1,
                 price_at_order=products[2].price,
+                category_id=products[2].category_id,
             ),
             OrderItem(
                 order_id=2,
                 product_id=9,  # Sony WH-1000XM5
                 quantity=2,
                 price_at_order=products[8].price,
+                category_id=products[8].category_id,
             ),
             # Заказ 3 - 1 товар (2 штуки)
             OrderItem(
@@ -319,6 +328,7 @@ def seed_data():
                 product_id=2,  # Samsung Galaxy S23 Ultra
                 quantity=2,
                 price_at_order=products[1].price,
+                category_id=products[1].category_id,
             ),
             # Заказ 4 - 2 товара
             OrderItem(
@@ -326,12 +336,14 @@ def seed_data():
                 product_id=7,  # iPad Pro 12.9"
                 quantity=1,
                 price_at_order=products[6].price,
+                category_id=products[6].category_id,
             ),
             OrderItem(
                 order_id=4,
                 product_id=10,  # Apple AirPods Pro 2
                 quantity=1,
                 price_at_order=products[9].price,
+                category_id=products[9].category_id,
             ),
             # Заказ 5 - 1 товар
             OrderItem(
@@ -339,6 +351,7 @@ def seed_data():
                 product_id=13,  # LG OLED C2
                 quantity=1,
                 price_at_order=products[12].price,
+                category_id=products[12].category_id,
             ),
         ]
         db.add_all(order_items)
@@ -348,6 +361,11 @@ def seed_data():
         for order in orders:
             items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
             order.amount = sum(item.price_at_order * item.quantity for item in items)
+            order.item_count = len(items)
+        db.commit()
+
+        # Витрины продаж по созданным заказам
+        analytics_crud.rebuild_sales(db)
         db.commit()
 
         # Отзывы
@@ -400,6 +418,7 @@ def seed_data():
         ]
         db.add_all(reviews)
         db.commit()
+        recompute_ratings(db)
 
         print("Данные успешно загружены.")
     except Exception as e:
@@ -1,19 +1,40 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from security import get_password_hash
+from typing import Optional
+from security import get_password_hash, invalidate_principal
 from . import schemas
 import models
+from pagination import apply_keyset
+from product import crud as prod_crud
+from order import crud as order_crud
 
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 
+async def get_user_async(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).where(models.User.email == email))
+
+
+def get_users(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+):
+    query = apply_keyset(
+        db.query(models.User), [models.User.id], "id:asc", cursor, False
+    )
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 
 def create_user(db: Session, user: schemas.UserCreate):
@@ -38,6 +59,7 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
         for key, value in update_data.items():
             setattr(db_user, key, value)
         db.commit()
+        invalidate_principal(user_id)
         db.refresh(db_user)
     return db_user
 
@@ -45,6 +67,15 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
 def delete_user(db: Session, user_id: int):
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
+        for review in db_user.reviews:
+            if review.status == models.ReviewStatus.APPROVED:
+                prod_crud.adjust_rating(db, review.product_id, {review.rating: -1})
+        # Заказы удаляются вместе с пользователем: их товары возвращаются на
+        # склад, а продажи вычитаются из витрин
+        released = [order_crud.release_order(db, order) for order in db_user.orders]
         db.delete(db_user)
         db.commit()
+        invalidate_principal(user_id)
+        if any(released):
+            prod_crud.invalidate_product_counts()
     return db_user
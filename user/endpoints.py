@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
+from typing import Optional
 
 from database import get_db
+from pagination import set_next_cursor_header
 from security import (
+    Principal,
     get_current_user,
     check_admin_role,
 )
 from . import crud, schemas
-from models import User
 
 router = APIRouter(prefix="/users", tags=["Пользователи"])
 
@@ -18,8 +20,15 @@ router = APIRouter(prefix="/users", tags=["Пользователи"])
     response_model=schemas.User,
     description="Получить информацию о текущем пользователе",
 )
-def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+def read_users_me(
+    current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    db_user = crud.get_user(db, user_id=current_user.id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    return db_user
 
 
 @router.get(
@@ -29,11 +38,17 @@ def read_users_me(current_user: User = Depends(get_current_user)):
     description="Получить список пользователей (только для администратора)",
 )
 def read_users(
+    response: Response,
     skip: int = Query(0, description="Смещение результатов"),
     limit: int = Query(100, description="Максимальное количество результатов"),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (вместо skip)"
+    ),
     db: Session = Depends(get_db),
 ):
-    return crud.get_users(db, skip=skip, limit=limit)
+    users = crud.get_users(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor_header(response, users, limit)
+    return users
 
 
 @router.post(